@@ -0,0 +1,47 @@
+# Compares the default (compiled plan) Structure codecs with the generated codecs
+# on the shipped .map and .sav resources. Run from the repository root.
+import pathlib
+import timeit
+
+from sourcehold.aivs.AIVDirectory import AIVDirectory
+from sourcehold.maps.CompressedSection import CompressedSection
+from sourcehold.maps.Description import Description
+from sourcehold.maps.Directory import Directory
+from sourcehold.maps.Map import Map
+from sourcehold.maps.SimpleSection import SimpleSection
+from sourcehold.structure_tools.Buffer import Buffer
+from sourcehold.structure_tools.codegen import enable_generated_codecs, disable_generated_codecs
+
+CLASSES = (Map, Directory, AIVDirectory, Description, CompressedSection, SimpleSection)
+REPEAT = 20
+
+files = sorted(pathlib.Path("resources/map").rglob("*.map")) + sorted(pathlib.Path("resources/sav").rglob("*.sav"))
+
+
+def parse(raw):
+    return Map().from_buffer(Buffer(raw))
+
+
+def serialize(m):
+    m.serialize_to_buffer(Buffer())
+
+
+def measure(raw):
+    m = parse(raw)
+    t_parse = min(timeit.repeat(lambda: parse(raw), number=1, repeat=REPEAT))
+    t_serialize = min(timeit.repeat(lambda: serialize(m), number=1, repeat=REPEAT))
+    return t_parse, t_serialize
+
+
+print("{:40s} {:>12s} {:>12s} {:>12s} {:>12s}".format("file", "parse", "parse (gen)", "write", "write (gen)"))
+for path in files:
+    raw = path.read_bytes()
+
+    disable_generated_codecs()
+    p0, s0 = measure(raw)
+
+    enable_generated_codecs(*CLASSES)
+    p1, s1 = measure(raw)
+    disable_generated_codecs()
+
+    print("{:40s} {:10.2f}ms {:10.2f}ms {:10.2f}ms {:10.2f}ms".format(path.name, p0 * 1000, p1 * 1000, s0 * 1000, s1 * 1000))
@@ -1,5 +1,8 @@
 from .structure_tools.Buffer import Buffer
+from .structure_tools.MemoryBuffer import MemoryBuffer
 from .maps.Map import Map
+from .maps.MapMetadata import MapMetadata
+from . import iotools
 import pathlib
 import unittest
 import sys
@@ -15,23 +18,55 @@ def test():
     unittest.TextTestRunner(descriptions=True, verbosity=2).run(test_suite)
 
 
-def load_map(path, strict=True, unpack=True, force=False):
-    buf = Buffer(pathlib.Path(path).read_bytes())
-    map = Map().from_buffer(buf)
+def load_map(path, strict=True, unpack=True, force=False, zero_copy=False, lazy=False, executor=None, workers=None,
+             verify="eager", section_cache=None, sections=None):
+    if verify not in ("eager", "lazy", "off"):
+        raise Exception("Invalid verify policy: {}".format(verify))
+    if sections is not None:
+        # Only the given sections (indices, keys or Map.MAP_SECTIONS names) are parsed and unpacked.
+        lazy = True
+    if zero_copy or lazy:
+        # Memory maps the file, sections reference slices of it instead of holding copies.
+        buf = MemoryBuffer.from_file(path)
+    else:
+        buf = Buffer(pathlib.Path(path).read_bytes())
+    # In lazy mode the directory sections are SectionProxy objects, parsed and decompressed on first use.
+    # verify="lazy" skips crc32 and size checks on unpack until map.verify(), verify="off" skips them altogether.
+    # A SectionCache bounds the memory of decompressed payloads, see SectionCache.default for a process-wide one.
+    kwargs = {} if section_cache is None else {"section_cache": section_cache}
+    map = Map().from_buffer(buf, lazy=lazy, verify=verify, **kwargs)
     if strict:
         if buf.remaining() != 0:
             raise Exception("Error, bytes remaining at end of buffer")
-    if unpack:
-        map.unpack(force)
+    if sections is not None:
+        map.load_sections(sections, unpack, force)
+    elif unpack:
+        map.unpack(force, executor, workers)
     return map
 
 
-def save_map(map, path, pack=True, force=False):
+def scan_map_metadata(path, verify="eager"):
+    # Reads the header, preview, description, u1..u4 and the directory header with a few small reads.
+    return MapMetadata.from_file(path, verify=verify)
+
+
+def save_map(map, path, pack=True, force=False, executor=None, incremental=False):
     buf = Buffer()
     if pack:
-        map.pack(force)
+        # Only dirty sections are compressed again, the others write their loaded compressed payloads as they are.
+        map.pack(force, executor)
     map.serialize_to_buffer(buf)
-    pathlib.Path(path).write_bytes(buf.getvalue())
+    mapped = getattr(map, "_buf", None)
+    if isinstance(mapped, MemoryBuffer) and mapped.path is not None and os.path.exists(path) and \
+            os.path.samefile(mapped.path, path):
+        # The map is overwriting the file it is mapped from, which os.replace refuses on Windows. It lets go first.
+        map.close()
+    if incremental and not isinstance(getattr(map, "_buf", None), MemoryBuffer):
+        # If the file has the same size, only the chunks that changed are written. Memory mapped maps are excluded,
+        # their unloaded sections still read from the mapped file.
+        if iotools.patch_file(path, buf.getbuffer()) is not None:
+            return
+    iotools.write_atomic(path, buf.getbuffer())
 
 
 import json
@@ -7,15 +7,17 @@ from sourcehold import save_map
 from sourcehold import load_map
 from sourcehold.structure_tools.Buffer import Buffer
 from sourcehold.compression import COMPRESSION
+from sourcehold.compression.parallel import create_executor
 
 from sourcehold.tool.argparsers.common import main_parser
 from sourcehold.tool.argparsers.services import services_parser, convert_parser
 from sourcehold.tool.memory.map import memory_map
 from sourcehold.tool.modify.map import modify_map
+from sourcehold.tool.batch import EXTENSION_FILE, run_batch, format_report, write_report
 
 file_input_output = argparse.ArgumentParser(add_help=False)
-file_input_output.add_argument("--in", help="files or folders to (un)pack", nargs='+', required=True)
-file_input_output.add_argument("--out", help="a folder to (un)pack files to")
+file_input_output.add_argument("--in", dest="input", help="files or folders to (un)pack", nargs='+', required=True)
+file_input_output.add_argument("--out", dest="output", help="a folder to (un)pack files to, or the file to pack to without --jobs and --report")
 
 multiple_file_input_output = argparse.ArgumentParser(add_help=False)
 multiple_file_input_output.add_argument("--in", help="files or folders to (un)pack", nargs='+', required=True)
@@ -28,6 +30,10 @@ file_manipulation_parser_group = file_manipulation_parser.add_mutually_exclusive
 file_manipulation_parser_group.add_argument("--unpack", action='store_const', const=True, default=False, help="unpack a .map/.sav/.msv file to a folder")
 file_manipulation_parser_group.add_argument("--pack", action='store_const', const=True, default=False, help="pack a folder into a .map/.sav/.msv file")
 file_manipulation_parser_group.add_argument("--what", help="what to unpack from the map file, e.g., '1001' for section 1001", default="all")
+file_manipulation_parser.add_argument("--workers", help="number of processes used to (de)compress sections", type=int, default=1)
+file_manipulation_parser.add_argument("--jobs", help="number of files to (un)pack in parallel, failures are reported instead of aborting. --out is a folder, packed files are written into it", type=int, default=1)
+file_manipulation_parser.add_argument("--report", help="write a JSON report of the (un)packed files to this file", default=None)
+file_manipulation_parser.add_argument("--extension", help="extension of files packed with --jobs, defaults to the extension the folder was unpacked from, or .map", default=None)
 
 aiv_parser = services_parser.add_parser('aiv')
 aiv_subparsers = aiv_parser.add_subparsers(dest='method', required=True, title='method')
@@ -134,11 +140,24 @@ def main():
         if args.unpack and args.pack:
             raise Exception("Cannot unpack and pack at the same time")
 
+        if args.jobs > 1 or args.report:
+            if args.what != "all":
+                raise Exception("--jobs and --report only support unpacking 'all'")
+            if args.workers > 1:
+                raise Exception("--workers cannot be combined with --jobs and --report, every job runs in its own process")
+            report = run_batch("unpack" if args.unpack else "pack", input_files, args.output, args.jobs, args.extension)
+            print(format_report(report))
+            if args.report:
+                write_report(report, args.report)
+            if report["failed"]:
+                sys.exit(1)
+            return
+
         if args.unpack:
             for file in input_files:
 
                 path = pathlib.Path(file)
-                map = load_map(file)
+                map = load_map(file, workers=args.workers)
 
                 name = path.name
                 name = name.split(".")[0]
@@ -188,21 +207,28 @@ def main():
                         print(f"unpacking file {name} to folder {dst.name}")
 
                     map.dump_to_folder(str(dst))
+                    (dst / EXTENSION_FILE).write_text(path.suffix)
 
         if args.pack:
-            for file in input_files:
-                path = pathlib.Path(file).absolute()
+            executor = create_executor(args.workers) if args.workers > 1 else None
+            try:
+                for file in input_files:
+                    path = pathlib.Path(file).absolute()
 
-                map = Map().load_from_folder(str(path))
-                map.pack(True)
+                    map = Map().load_from_folder(str(path), executor)
+                    # load_from_folder compressed the directory sections, only the map sections are left
+                    map.pack(False, executor)
 
-                name = path.name
+                    name = path.name
 
-                dst = pathlib.Path(args.output).absolute()
+                    dst = pathlib.Path(args.output).absolute()
 
-                print(f"packing file from folder {path} to file {str(dst)}")
+                    print(f"packing file from folder {path} to file {str(dst)}")
 
-                save_map(map, dst)
+                    save_map(map, dst)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
 
     import PIL.Image
     import struct
@@ -404,24 +430,29 @@ def main():
                         print(f"failed on section: {e}")
 
   if args.service == "compression":
-        input_file = args.input
-        if input_file == "-":
-            input_data = sys.stdin.buffer.read()
-        else:
-            input_data = pathlib.Path(input_file).read_bytes()
+        from sourcehold.compression.streams import read_chunks
 
-        if args.decompress:
-            output_data = COMPRESSION.decompress(input_data)
-        elif args.compress:
-            output_data = COMPRESSION.compress(input_data)
-        else:
+        if not args.decompress and not args.compress:
             raise Exception("either select --compress or --decompress")
 
+        # Streams chunk by chunk, memory use does not depend on the input size.
+        input_file = args.input
+        src = sys.stdin.buffer if input_file == "-" else open(input_file, 'rb')
         output_file = args.output
-        if output_file == "-":
-            sys.stdout.buffer.write(output_data)
-        else:
-            pathlib.Path(output_file).write_bytes(output_data)
+        dst = sys.stdout.buffer if output_file == "-" else open(output_file, 'wb')
+        try:
+            if args.decompress:
+                chunks = COMPRESSION.iter_decompress(read_chunks(src))
+            else:
+                chunks = COMPRESSION.iter_compress(read_chunks(src))
+            for chunk in chunks:
+                dst.write(chunk)
+            dst.flush()
+        finally:
+            if src is not sys.stdin.buffer:
+                src.close()
+            if dst is not sys.stdout.buffer:
+                dst.close()
   # if __name__ == "__main__":
   #     main()
 main()
\ No newline at end of file
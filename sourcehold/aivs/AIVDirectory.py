@@ -1,7 +1,9 @@
 from sourcehold.aivs.sections import AIVSection, CompressedAIVSection, get_section_for_index
 from sourcehold.iotools import read_file, write_to_file
+from sourcehold.maps.SectionIndex import SectionIndex, section_key
 from sourcehold.structure_tools import bytes_to_int_array, ints_to_byte_array
 from sourcehold.structure_tools.Buffer import Buffer
+from sourcehold.structure_tools.diff import diff_sections
 from sourcehold.structure_tools.Field import Field
 from sourcehold.structure_tools.Structure import Structure
 
@@ -31,18 +33,24 @@ class AIVDirectory(Structure):
     section_offsets = Field[List[int]]("section_offsets", "I", _MAX_SECTIONS_COUNT)
     directory_u7 = Field("directory_u7", "I")
 
+    def __init__(self):
+        super().__init__()
+        self._section_index = SectionIndex()
+
     def keys(self):
         def all_keys():
             if hasattr(self, "sections"):
                 for section in self.sections:
-                    if hasattr(section, "KEY"):
-                        yield section.KEY
+                    key = section_key(section)
+                    if key is not None:
+                        yield key
 
         return list(all_keys())
 
     def from_buffer(self, buf: Buffer, **kwargs):
         super().from_buffer(buf, **kwargs)
         self.sections = []
+        self._section_index.invalidate()
         for i in range(self.sections_count):
             logging.debug("processing section {}".format(i))
             compressed = self.section_compressed[i] == 1
@@ -61,30 +69,12 @@ class AIVDirectory(Structure):
         return indices
 
     def __getitem__(self, item):
-        if type(item) == str:
-            for section in self.sections:
-                if hasattr(section, "KEY"):
-                    if item == section.KEY:
-                        return section
-        # access directory item by index
-        if not item in self.section_indices:
-            raise KeyError(item)
-        i = self.section_indices.index(item)
-        return self.sections[i]
+        # access directory item by KEY or by index
+        return self.sections[self._section_index.position(self, item)]
 
     def __setitem__(self, key, value):
-        if type(key) == str:
-            for section in self.sections:
-                if hasattr(section, "KEY"):
-                    if key == section.KEY:
-                        i = self.section_indices.index(section)
-                        self.sections[i] = value
-                        return
-        # access directory item by index
-        if not key in self.section_indices:
-            raise KeyError(key)
-        i = self.section_indices.index(key)
-        self.sections[i] = value
+        self.sections[self._section_index.position(self, key)] = value
+        self._section_index.invalidate()
 
     def unpack(self, force = False):
         for section in self.sections:
@@ -194,6 +184,7 @@ class AIVDirectory(Structure):
         self._load_spec((pathlib.Path(path) / "spec").read_text('ascii'))
 
         self.sections = []
+        self._section_index.invalidate()
         for i in range(self.sections_count):
             sp = os.path.join(path, str(self.section_indices[i]))
 
@@ -218,23 +209,17 @@ class AIVDirectory(Structure):
 
         if self.section_indices == other.section_indices:
             for i in range(self.sections_count):
-                da = self.sections[i].get_data()
-                db = other.sections[i].get_data()
-                n = min(len(da), len(db))
-                diffs = [i for i in range(n) if da[i] != db[i]]
-                if len(diffs) > 0:
+                d = diff_sections(self.sections[i], other.sections[i])
+                if d is not None and d.count > 0:
                     yield "unequal values ({}/{} = {}) for section: {} in\n\tself: \n{}\n\tand other: \n{}".format(
-                        len(diffs), n, round(len(diffs)/n, 2),
-                        self.section_indices[i], '', '')
+                        d.count, d.n, round(d.count/d.n, 2),
+                        self.section_indices[i], d.ranges[:10], '')
 
     def different_sections(self, other):
         if self.section_indices == other.section_indices:
             for i in range(self.sections_count):
-                da = self.sections[i].get_data()
-                db = other.sections[i].get_data()
-                n = min(len(da), len(db))
-                diffs = [i for i in range(n) if da[i] != db[i]]
-                if len(diffs) > 0:
+                d = diff_sections(self.sections[i], other.sections[i])
+                if d is not None and d.count > 0:
                     yield self.section_indices[i]
         else:
             return "ALL"
\ No newline at end of file
@@ -1,11 +1,16 @@
+from sourcehold.compression import streams
+
+
 class AbstractCompressor(object):
 
     def __init__(self):
         pass
 
     def _sanitize(self, data):
+        if data.__class__ == bytes:
+            return data
         try:
-            return bytes(bytearray(data))
+            return bytes(data)
         except Exception as e:
             raise Exception("Unable to sanitize input of type: " + str(type(data)))
 
@@ -13,4 +18,32 @@ class AbstractCompressor(object):
         raise NotImplementedError()
 
     def decompress(self, data):
-        raise NotImplementedError()
\ No newline at end of file
+        raise NotImplementedError()
+
+    def compressobj(self, level = 6):
+        """Object with compress(chunk) and flush() methods, like zlib.compressobj."""
+        raise NotImplementedError()
+
+    def decompressobj(self):
+        """Object with a decompress(chunk) method and an eof attribute, like zlib.decompressobj."""
+        raise NotImplementedError()
+
+    def iter_compress(self, chunks, level = 6):
+        return streams.iter_compress(self.compressobj(level), chunks)
+
+    def iter_decompress(self, chunks):
+        return streams.iter_decompress(self.decompressobj(), chunks)
+
+    def writer(self, fileobj, level = 6):
+        return streams.CompressedWriter(fileobj, self.compressobj(level))
+
+    def reader(self, fileobj):
+        return streams.DecompressedReader(fileobj, self.decompressobj())
+
+    def parameters(self, level = 6):
+        """Bytes that identify the output format of compress(data, level), used as part of cache keys."""
+        return bytes([level])
+
+    def parameters_of(self, data):
+        """parameters() of the call that produced the compressed data, or None if unknown."""
+        return None
@@ -4,17 +4,65 @@ from sourcehold.compression.AbstractCompressor import AbstractCompressor
 import dclimplode
 
 
+class _CompressObject(object):
+
+    def __init__(self, obj, sanitize):
+        self._obj = obj
+        self._sanitize = sanitize
+
+    def compress(self, data):
+        return self._obj.compress(self._sanitize(data))
+
+    def flush(self):
+        return self._obj.flush()
+
+
+class _DecompressObject(object):
+
+    def __init__(self, obj, sanitize):
+        self._obj = obj
+        self._sanitize = sanitize
+
+    def decompress(self, data):
+        return self._obj.decompress(self._sanitize(data))
+
+    @property
+    def eof(self):
+        return self._obj.eof
+
+
 class DCL(AbstractCompressor):
+    """PKWare DCL implode. The compression level is the dictionary size in bits, 4, 5 or 6 for 1024, 2048 or 4096 bytes.
+
+    mode is dclimplode.CMP_BINARY or dclimplode.CMP_ASCII. Decompression reads both from the stream header.
+    """
+
+    DICTIONARY_SIZES = {4: 1024, 5: 2048, 6: 4096}
 
-    def __init__(self):
+    def __init__(self, mode = dclimplode.CMP_BINARY):
         super().__init__()
+        if mode not in (dclimplode.CMP_BINARY, dclimplode.CMP_ASCII):
+            raise Exception("Invalid DCL mode: {}".format(mode))
+        self.mode = mode
 
     def compress(self, data, level = 6):
-        if level == 6:
-          obj = dclimplode.compressobj(dclimplode.CMP_BINARY, 4096)
-          return obj.compress(self._sanitize(data)) + obj.flush()
-        raise NotImplementedError(f"Compression level not implemented: {level}")
+        obj = self.compressobj(level)
+        return obj.compress(data) + obj.flush()
 
     def decompress(self, data):
-        obj = dclimplode.decompressobj()
-        return obj.decompress(self._sanitize(data))
\ No newline at end of file
+        return self.decompressobj().decompress(data)
+
+    def compressobj(self, level = 6):
+        if level not in DCL.DICTIONARY_SIZES:
+            raise NotImplementedError(f"Compression level not implemented: {level}")
+        return _CompressObject(dclimplode.compressobj(self.mode, DCL.DICTIONARY_SIZES[level]), self._sanitize)
+
+    def decompressobj(self):
+        return _DecompressObject(dclimplode.decompressobj(), self._sanitize)
+
+    def parameters(self, level = 6):
+        # The two header bytes of the stream: literal mode and dictionary size bits.
+        return bytes([self.mode, level])
+
+    def parameters_of(self, data):
+        return bytes(data[:2])
@@ -7,4 +7,43 @@ import sys
 
 from sourcehold.compression.DCL import DCL
 
+import dclimplode
+
 COMPRESSION = DCL()
+
+#  Named compressors that sections can select with _COMPRESSOR_, see get_compressor
+COMPRESSORS = {}
+
+
+def register_compressor(name, compressor):
+    COMPRESSORS[name] = compressor
+    return compressor
+
+
+def get_compressor(name=None):
+    """The registered compressor called name, or COMPRESSION if name is None."""
+    if name is None:
+        return COMPRESSION
+    if name not in COMPRESSORS:
+        raise Exception("Unknown compressor: {}".format(name))
+    return COMPRESSORS[name]
+
+
+register_compressor("dcl-binary", DCL(dclimplode.CMP_BINARY))
+register_compressor("dcl-ascii", DCL(dclimplode.CMP_ASCII))
+
+
+def enable_cache(cache=None):
+    """Routes COMPRESSION through a CachedCompressor, returns its CompressionCache."""
+    global COMPRESSION
+    from sourcehold.compression.cache import CachedCompressor
+    if not isinstance(COMPRESSION, CachedCompressor):
+        COMPRESSION = CachedCompressor(COMPRESSION, cache)
+    elif cache is not None:
+        COMPRESSION.cache = cache
+    return COMPRESSION.cache
+
+
+def disable_cache():
+    global COMPRESSION
+    COMPRESSION = getattr(COMPRESSION, "compressor", COMPRESSION)
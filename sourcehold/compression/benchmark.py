@@ -0,0 +1,89 @@
+# Compression ratio and speed per section index, for every registered compressor and DCL dictionary size.
+#
+# python -m sourcehold.compression.benchmark resources/map resources/sav resources/msv
+import argparse
+import json
+import pathlib
+import time
+
+from sourcehold import compression, load_map
+
+EXTENSIONS = (".map", ".sav", ".msv")
+LEVELS = (4, 5, 6)
+
+
+def find_files(paths):
+    for path in paths:
+        path = pathlib.Path(path)
+        if path.is_file():
+            yield path
+        else:
+            yield from sorted(p for p in path.rglob("*") if p.suffix.lower() in EXTENSIONS)
+
+
+def iter_payloads(path):
+    """(section name, uncompressed data) of every compressed payload in a map file."""
+    m = load_map(str(path), unpack=False)
+    yield "preview", m.preview.get_data()
+    yield "description", m.description.get_data()
+    indices, sections = m.directory.compressed_sections()
+    for index, section in zip(indices, sections):
+        yield index, section.get_data()
+
+
+def benchmark(paths, settings=None):
+    """Returns {(section name, compressor name, level): [payloads, uncompressed bytes, compressed bytes, seconds]}."""
+    if settings is None:
+        settings = [(name, level) for name in sorted(compression.COMPRESSORS) for level in LEVELS]
+
+    results = {}
+    for path in find_files(paths):
+        for section, data in iter_payloads(path):
+            data = bytes(data)
+            for name, level in settings:
+                compressor = compression.get_compressor(name)
+                start = time.perf_counter()
+                compressed = compressor.compress(data, level)
+                elapsed = time.perf_counter() - start
+
+                entry = results.setdefault((section, name, level), [0, 0, 0, 0.0])
+                entry[0] += 1
+                entry[1] += len(data)
+                entry[2] += len(compressed)
+                entry[3] += elapsed
+    return results
+
+
+def format_report(results):
+    lines = ["{:>12s} {:>12s} {:>6s} {:>8s} {:>14s} {:>14s} {:>8s} {:>10s}".format(
+        "section", "compressor", "level", "payloads", "uncompressed", "compressed", "ratio", "MB/s")]
+    for (section, name, level), (count, size, compressed, seconds) in sorted(results.items(), key=lambda i: str(i[0])):
+        lines.append("{:>12} {:>12s} {:6d} {:8d} {:14d} {:14d} {:8.3f} {:10.2f}".format(
+            section, name, level, count, size, compressed,
+            compressed / size if size else 0,
+            size / seconds / 1e6 if seconds else 0))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark compression settings on map files")
+    parser.add_argument("paths", nargs="+", help="map files or folders to search for .map, .sav and .msv files")
+    parser.add_argument("--compressor", nargs="+", help="registered compressor names", default=None)
+    parser.add_argument("--level", nargs="+", type=int, help="DCL dictionary size bits", default=list(LEVELS))
+    parser.add_argument("--json", help="also write the results to this file", default=None)
+    args = parser.parse_args(argv)
+
+    names = args.compressor if args.compressor else sorted(compression.COMPRESSORS)
+    results = benchmark(args.paths, [(name, level) for name in names for level in args.level])
+
+    print(format_report(results))
+
+    if args.json:
+        pathlib.Path(args.json).write_text(json.dumps([
+            {"section": section, "compressor": name, "level": level, "payloads": count, "uncompressed": size,
+             "compressed": compressed, "seconds": seconds}
+            for (section, name, level), (count, size, compressed, seconds) in results.items()], indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+from sourcehold.compression.AbstractCompressor import AbstractCompressor
+
+
+import collections
+import hashlib
+import os
+import pathlib
+import tempfile
+
+
+class CompressionCache(object):
+    """LRU store of compressed payloads, keyed by a hash of the uncompressed data and the compressor parameters.
+
+    Entries are kept in memory up to max_entries and max_bytes. If path is given, entries are also written to (and
+    looked up in) that folder, one file per entry.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = None if path is None else pathlib.Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def key(data, parameters: str):
+        return "{}-{}".format(parameters, hashlib.blake2b(data, digest_size=20).hexdigest())
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+        if self.path is not None:
+            fp = self.path / key
+            if fp.exists():
+                value = fp.read_bytes()
+                self._remember(key, value)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        value = bytes(value)
+        self._remember(key, value)
+
+        if self.path is not None and not (self.path / key).exists():
+            self.path.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first, concurrent writers of the same key then cannot produce a torn entry.
+            fd, tmp = tempfile.mkstemp(dir=str(self.path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(value)
+            os.replace(tmp, str(self.path / key))
+
+    def _remember(self, key, value):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        if len(value) > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._bytes += len(value)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            k, v = self._entries.popitem(last=False)
+            self._bytes -= len(v)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CachedCompressor(AbstractCompressor):
+    """Wraps a compressor, compress() returns cached results for payloads that were compressed (or decompressed) before.
+
+    Decompressed payloads seed the cache with their original compressed bytes, so re-saving a loaded map only
+    compresses the sections that changed.
+    """
+
+    def __init__(self, compressor: AbstractCompressor, cache: CompressionCache = None):
+        super().__init__()
+        self.compressor = compressor
+        self.cache = CompressionCache() if cache is None else cache
+
+    def _key(self, data, parameters):
+        return self.cache.key(data, "{}-{}".format(type(self.compressor).__name__, parameters.hex()))
+
+    def lookup(self, data, level=6):
+        return self.cache.get(self._key(data, self.compressor.parameters(level)))
+
+    def store(self, data, level, compressed):
+        self.cache.put(self._key(data, self.compressor.parameters(level)), compressed)
+
+    def seed(self, uncompressed, compressed):
+        parameters = self.compressor.parameters_of(compressed)
+        if parameters is not None:
+            self.cache.put(self._key(uncompressed, parameters), compressed)
+
+    def compress(self, data, level=6):
+        compressed = self.lookup(data, level)
+        if compressed is None:
+            compressed = self.compressor.compress(data, level)
+            self.store(data, level, compressed)
+        return compressed
+
+    def decompress(self, data):
+        uncompressed = self.compressor.decompress(data)
+        self.seed(uncompressed, data)
+        return uncompressed
+
+    def compressobj(self, level=6):
+        return self.compressor.compressobj(level)
+
+    def decompressobj(self):
+        return self.compressor.decompressobj()
@@ -0,0 +1,60 @@
+import numpy
+
+
+#  log(compressed size / uncompressed size) = a + b * log(u) + c * log(hn) + d * log(h) per DCL level, fitted on all
+#  compressed payloads in resources/map, resources/sav and resources/msv. The median relative error is about 9%.
+_COEFFICIENTS = {
+    4: (-0.3995, 0.8657, -0.0709, -0.1356),
+    5: (-0.4744, 0.8625, -0.0675, -0.1509),
+    6: (-0.5622, 0.839, -0.0668, -0.145),
+}
+
+#  DCL literals cost 9 bits, plus the stream header and end marker
+_MAX_RATIO = 9 / 8
+_OVERHEAD = 4
+
+_EPSILON = 1e-3
+
+#  The highest byte entropy among the calibration payloads is about 0.84
+_HIGH_ENTROPY = 0.9
+
+
+def _entropy(values):
+    if len(values) == 0:
+        return 0.0
+    counts = numpy.bincount(values, minlength=256)
+    p = counts[counts > 0] / len(values)
+    return float(-(p * numpy.log2(p)).sum()) / 8
+
+
+def payload_statistics(data, block=4096, blocks=16):
+    """(h, u, hn) of up to blocks evenly spaced samples of block bytes.
+
+    h is the byte entropy (0 to 1), u the fraction of bytes that differ from the bytes 1, 2, 4 and 8 positions back,
+    i.e. that do not continue a run or a repeating 16, 32 or 64 bit value, and hn the entropy of those bytes.
+    """
+    a = numpy.frombuffer(data, dtype=numpy.uint8)
+    if len(a) > block * blocks:
+        starts = numpy.linspace(0, len(a) - block, blocks).astype(int)
+        a = numpy.concatenate([a[start:start + block] for start in starts])
+
+    novel = numpy.ones(len(a), dtype=bool)
+    for k in (1, 2, 4, 8):
+        novel[k:] &= a[k:] != a[:-k]
+
+    return _entropy(a), float(novel.mean()) if len(a) else 0.0, _entropy(a[novel])
+
+
+def estimate_compressed_size(data, level=6):
+    """Estimated length of COMPRESSION.compress(data, level), without compressing."""
+    n = len(data)
+    if n == 0:
+        return _OVERHEAD
+    h, u, hn = payload_statistics(data)
+    a, b, c, d = _COEFFICIENTS.get(level, _COEFFICIENTS[6])
+    log_ratio = a + b * numpy.log(u + _EPSILON) + c * numpy.log(hn + _EPSILON) + d * numpy.log(h + _EPSILON)
+    ratio = float(numpy.exp(log_ratio))
+    if h > _HIGH_ENTROPY:
+        # Outside of the calibration data, e.g. already compressed data: unmatched bytes become 9 bit literals.
+        ratio = max(ratio, u * _MAX_RATIO)
+    return int(n * min(ratio, _MAX_RATIO)) + _OVERHEAD
@@ -0,0 +1,212 @@
+from sourcehold import compression
+from sourcehold.compression.cache import CachedCompressor
+from sourcehold.compression.estimate import estimate_compressed_size
+
+
+import concurrent.futures
+import contextlib
+import zlib
+
+
+def create_executor(workers=None, kind="process"):
+    """Pool for pack_sections and unpack_sections.
+
+    dclimplode holds the GIL while it (de)compresses, so only a process pool runs sections truly in parallel.
+    """
+    if kind == "process":
+        return concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    if kind == "thread":
+        return concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    raise Exception("Unknown executor kind: {}".format(kind))
+
+
+def _compressor(name):
+    # Workers bypass a CachedCompressor, the cache is consulted and filled by the calling process.
+    compressor = compression.get_compressor(name)
+    return getattr(compressor, "compressor", compressor)
+
+
+def _cache(name):
+    compressor = compression.get_compressor(name)
+    return compressor if isinstance(compressor, CachedCompressor) else None
+
+
+def _compress(item):
+    data, level, name = item
+    return _compressor(name).compress(data, level)
+
+
+@contextlib.contextmanager
+def executor_for(executor=None, workers=None):
+    """Yields executor, or a process pool with workers processes that is shut down afterwards, or None."""
+    if executor is not None or workers is None or workers <= 1:
+        yield executor
+        return
+    with create_executor(workers) as executor:
+        yield executor
+
+
+def _decompress(item):
+    data, name, with_crc = item
+    uncompressed = _compressor(name).decompress(data)
+    return uncompressed, zlib.crc32(uncompressed) if with_crc else None
+
+
+def _crc32(data):
+    # Unlike binascii, zlib releases the GIL while hashing large buffers.
+    return zlib.crc32(data)
+
+
+def _picklable(data):
+    if data.__class__ == bytes or data.__class__ == bytearray:
+        return data
+    return bytes(data)
+
+
+def pack_sections(sections, force=False, executor=None, names=None):
+    """Packs sections like calling section.pack(force) on each, but with the compression running on the executor.
+
+    Sections need compression_payload(force), apply_compressed(data) and _COMPRESSOR_ (see CompressedSection).
+    Results are applied in the order of sections, the output is identical to packing serially.
+    """
+    if names is None:
+        names = [type(section).__name__ for section in sections]
+
+    pending = []
+    for name, section in zip(names, sections):
+        payload = section.compression_payload(force)
+        if payload is not None:
+            pending.append((name, section, payload))
+
+    if executor is None:
+        for name, section, payload in pending:
+            section.apply_compressed(compression.get_compressor(section._COMPRESSOR_).compress(*payload))
+        return
+
+    futures = [None] * len(pending)
+    misses = []
+    for i, (name, section, (data, level)) in enumerate(pending):
+        cache = _cache(section._COMPRESSOR_)
+        futures[i] = None if cache is None else cache.lookup(data, level)
+        if futures[i] is None:
+            misses.append((estimate_compressed_size(data, level), i))
+
+    # The largest payloads are submitted first, so they do not end up running alone at the end.
+    for estimate, i in sorted(misses, reverse=True):
+        name, section, (data, level) = pending[i]
+        futures[i] = executor.submit(_compress, (_picklable(data), level, section._COMPRESSOR_))
+
+    for (name, section, (data, level)), future in zip(pending, futures):
+        if isinstance(future, concurrent.futures.Future):
+            try:
+                compressed = future.result()
+            except Exception as e:
+                raise Exception("Failed to compress section {}: {}".format(name, e)) from e
+            cache = _cache(section._COMPRESSOR_)
+            if cache is not None:
+                cache.store(data, level, compressed)
+        else:
+            compressed = future
+        section.apply_compressed(compressed)
+
+
+def unpack_sections(sections, force=False, executor=None, names=None):
+    """Decompresses and verifies sections like calling section.unpack(force) on each, using the executor.
+
+    With an executor, sections that were not decompressed yet are decompressed as well, also without force.
+
+    Sections need decompression_payload(force) and apply_decompressed(uncompressed, crc). Errors name the section.
+    """
+    if names is None:
+        names = [type(section).__name__ for section in sections]
+
+    pending = []
+    for name, section in zip(names, sections):
+        payload = section.decompression_payload(force)
+        if payload is None and executor is not None and not hasattr(section, "uncompressed"):
+            # get_data() would decompress these one at a time later on, decompress them with the pool instead
+            payload = section.data
+        if payload is not None:
+            pending.append((name, section, payload))
+
+    if executor is None:
+        for name, section, payload in pending:
+            try:
+                section.unpack(force)
+            except Exception as e:
+                raise Exception("Failed to unpack section {}: {}".format(name, e)) from e
+        return
+
+    futures = [executor.submit(_decompress, (_picklable(payload), section._COMPRESSOR_, section._verify == "eager"))
+               for name, section, payload in pending]
+    for (name, section, payload), future in zip(pending, futures):
+        try:
+            uncompressed, crc = future.result()
+            section.apply_decompressed(uncompressed, crc)
+            cache = _cache(section._COMPRESSOR_)
+            if cache is not None:
+                cache.seed(uncompressed, payload)
+        except Exception as e:
+            raise Exception("Failed to unpack section {}: {}".format(name, e)) from e
+
+
+class VerificationReport(object):
+    """Outcome of verify_sections: names of the sections that passed, were skipped, and failed (with the reason)."""
+
+    def __init__(self):
+        self.passed = []
+        self.skipped = []
+        self.failed = {}
+
+    @property
+    def ok(self):
+        return len(self.failed) == 0
+
+    def raise_for_errors(self):
+        if not self.ok:
+            raise Exception("Verification failed for sections: {}".format(
+                ", ".join("{} ({})".format(name, reason) for name, reason in self.failed.items())))
+
+    def __repr__(self):
+        return "VerificationReport(passed={}, skipped={}, failed={})".format(
+            len(self.passed), len(self.skipped), self.failed)
+
+
+def verify_sections(sections, force=False, executor=None, names=None) -> VerificationReport:
+    """Checks sizes and crc32 of sections that were not verified yet, decompressing them if needed.
+
+    Sections loaded with verify="off" and modified (dirty) sections are skipped, unless force is True for the former.
+    """
+    if names is None:
+        names = [type(section).__name__ for section in sections]
+
+    report = VerificationReport()
+    pending = []
+    for name, section in zip(names, sections):
+        decompressed = hasattr(section, "uncompressed")
+        if (decompressed and section._dirty) or ((section._verified or section._verify == "off") and not force):
+            report.skipped.append(name)
+            continue
+        if decompressed:
+            item = (_crc32, section.uncompressed)
+        else:
+            item = (_decompress, (_picklable(section.data), section._COMPRESSOR_, True))
+        pending.append((name, section, decompressed, item))
+
+    if executor is not None:
+        futures = [executor.submit(function, argument) for name, section, decompressed, (function, argument) in pending]
+
+    for i, (name, section, decompressed, (function, argument)) in enumerate(pending):
+        try:
+            # Without an executor the checks run here, so decompression errors are reported like the others.
+            result = function(argument) if executor is None else futures[i].result()
+            if decompressed:
+                crc = result
+            else:
+                uncompressed, crc = result
+                section.apply_decompressed(uncompressed, crc)
+            section.verify(crc)
+            report.passed.append(name)
+        except Exception as e:
+            report.failed[name] = str(e) or type(e).__name__
+    return report
@@ -0,0 +1,79 @@
+import io
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def read_chunks(fileobj, chunk_size=CHUNK_SIZE):
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_compress(compressobj, chunks):
+    for chunk in chunks:
+        out = compressobj.compress(chunk)
+        if out:
+            yield out
+    out = compressobj.flush()
+    if out:
+        yield out
+
+
+def iter_decompress(decompressobj, chunks):
+    for chunk in chunks:
+        out = decompressobj.decompress(chunk)
+        if out:
+            yield out
+        if decompressobj.eof:
+            return
+
+
+class CompressedWriter(io.RawIOBase):
+    """Write-only file that compresses everything written to it into fileobj. close() writes the end of the stream,
+    fileobj itself is left open."""
+
+    def __init__(self, fileobj, compressobj):
+        super().__init__()
+        self._fileobj = fileobj
+        self._obj = compressobj
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        n = len(memoryview(b).cast('B'))
+        out = self._obj.compress(b)
+        if out:
+            self._fileobj.write(out)
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._fileobj.write(self._obj.flush())
+        super().close()
+
+
+class DecompressedReader(io.RawIOBase):
+    """Read-only file over the decompressed contents of fileobj."""
+
+    def __init__(self, fileobj, decompressobj, chunk_size=CHUNK_SIZE):
+        super().__init__()
+        self._chunks = iter_decompress(decompressobj, read_chunks(fileobj, chunk_size))
+        self._pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._pending:
+            self._pending = next(self._chunks, None)
+            if self._pending is None:
+                self._pending = b''
+                return 0
+        n = min(len(b), len(self._pending))
+        b[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
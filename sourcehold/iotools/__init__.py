@@ -1,6 +1,13 @@
+import mmap
+import os
+import pathlib
 import struct
+import tempfile
+
+import numpy
 
 from sourcehold.structure_tools.Buffer import Buffer
+from sourcehold.structure_tools.UnderflowException import UnderflowException
 
 
 def unpack(type: str, data: bytes, amount=0):
@@ -32,5 +39,66 @@ def write_to_file(path, data):
         f.write(data)
 
 
+def read_at(f, offset, size):
+    """Reads size bytes at offset of an open file, with os.pread where available."""
+    if hasattr(os, "pread"):
+        data = os.pread(f.fileno(), size, offset)
+    else:
+        f.seek(offset)
+        data = f.read(size)
+    if len(data) < size:
+        raise UnderflowException("Data underflow. Expected {} bytes at {}, but got {}".format(size, offset, len(data)))
+    return data
+
+
+def write_atomic(path, data):
+    """Writes data to a temporary file next to path and renames it over path, readers never see a partial file."""
+    path = pathlib.Path(path)
+    try:
+        mode = path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        # mkstemp creates files only readable by the owner, use the permissions of a new file instead
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=path.name + ".", suffix=".tmp")
+    try:
+        os.chmod(tmp, mode)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, str(path))
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def patch_file(path, data, chunk_size=4096):
+    """Overwrites only the chunks of the file at path that differ from data.
+
+    Returns the number of chunks written, or None if the file does not exist or its size differs from len(data).
+    Unlike write_atomic this is not crash safe, an interrupted patch leaves a mix of old and new chunks.
+    """
+    data = memoryview(data).cast('B')
+    try:
+        f = open(path, 'r+b')
+    except FileNotFoundError:
+        return None
+    with f:
+        if os.fstat(f.fileno()).st_size != len(data) or len(data) == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0) as m:
+            different = numpy.frombuffer(m, dtype=numpy.uint8) != numpy.frombuffer(data, dtype=numpy.uint8)
+            chunks = numpy.unique(numpy.flatnonzero(different) // chunk_size)
+            del different
+            for chunk in chunks:
+                start = int(chunk) * chunk_size
+                m[start:start + chunk_size] = data[start:start + chunk_size]
+            m.flush()
+    return len(chunks)
+
+
 def _int_array_to_bytes(array):
     return b''.join(struct.pack("B", v) for v in array)
@@ -1,4 +1,6 @@
 from sourcehold import compression
+from sourcehold.compression.estimate import estimate_compressed_size
+from sourcehold.maps.SectionCache import SectionCache
 from sourcehold.structure_tools.Field import Field
 from sourcehold.structure_tools.Structure import Structure
 
@@ -12,37 +14,102 @@ class CompressedSection(Structure):
     hash = Field("hash", "I")
     data = Field("data", "B", compressed_size)
 
+    #  Name of a registered compressor (see compression.get_compressor), None for compression.COMPRESSION
+    _COMPRESSOR_ = None
+    #  Default level of new sections, loaded sections keep the level of their data
+    _COMPRESSION_LEVEL_ = 6
+
+    #  When to check sizes and crc32 of decompressed data: "eager" on unpack, "lazy" on verify() (see Map.verify),
+    #  "off" trusts the data. Set by from_buffer(verify=...).
+    _verify = "eager"
+    _verified = False
+    #  SectionCache that bounds the memory of decompressed payloads, set by from_buffer(section_cache=...)
+    _section_cache = None
+
     def __init__(self):
         super().__init__()
         self._dirty = False
 
+    def from_buffer(self, buf, **kwargs):
+        super().from_buffer(buf, **kwargs)
+        if "verify" in kwargs:
+            self._verify = kwargs["verify"]
+        self._section_cache = kwargs.get("section_cache", SectionCache.default)
+        return self
+
     def pack(self, force = False):
+        payload = self.compression_payload(force)
+        if payload is not None:
+            self.apply_compressed(compression.get_compressor(self._COMPRESSOR_).compress(*payload))
+
+    def compression_payload(self, force = False):
+        """(uncompressed data, compression level) if this section needs to be compressed by pack, else None."""
         if self._dirty or force:
             if not hasattr(self, "compression_level"):
-                self.compression_level = 6
-            self.data = compression.COMPRESSION.compress(self.uncompressed, self.compression_level)
-            self.hash = binascii.crc32(self.uncompressed)
-            self.uncompressed_size = len(self.uncompressed)
-            self.compressed_size = len(self.data)
-            self._dirty = False
+                self.compression_level = self._COMPRESSION_LEVEL_
+            return self.get_data(), self.compression_level
+        return None
+
+    def apply_compressed(self, data):
+        self.data = data
+        uncompressed = self.get_data()
+        self.hash = binascii.crc32(uncompressed)
+        self.uncompressed_size = len(uncompressed)
+        self.compressed_size = len(self.data)
+        self._verified = True
+        self._dirty = False
 
     def unpack(self, force = False):
-        if self._dirty or force:
-            self.compression_level = self.data[1]
-            self.uncompressed = compression.COMPRESSION.decompress(self.data)
-            assert len(self.data) == self.compressed_size
-            assert len(self.uncompressed) == self.uncompressed_size
-            assert binascii.crc32(self.uncompressed) == self.hash
-            self._dirty = False
+        payload = self.decompression_payload(force)
+        if payload is not None:
+            uncompressed = compression.get_compressor(self._COMPRESSOR_).decompress(payload)
+            self.apply_decompressed(uncompressed, binascii.crc32(uncompressed) if self._verify == "eager" else None)
+
+    def decompression_payload(self, force = False):
+        # Sections are decompressed on first use by get_data(), edited (dirty) sections keep their data unless forced
+        if force:
+            return self.data
+        return None
+
+    def apply_decompressed(self, uncompressed, crc=None):
+        self.compression_level = self.data[1]
+        self.uncompressed = uncompressed
+        # Payloads dropped by a SectionCache are decompressed again, they stay verified.
+        self._verified = self._verified or self._verify == "off"
+        if self._verify == "eager":
+            self.verify(crc)
+        self._dirty = False
+        if self._section_cache is not None:
+            self._section_cache.track(self)
+
+    def verify(self, crc=None):
+        """Checks the decompressed data against the header, crc is computed if not given."""
+        if crc is None:
+            crc = binascii.crc32(self.uncompressed)
+        assert len(self.data) == self.compressed_size, "compressed size mismatch"
+        assert len(self.uncompressed) == self.uncompressed_size, "uncompressed size mismatch"
+        assert crc == self.hash, "crc32 mismatch"
+        self._verified = True
 
     def get_data(self):
         if not hasattr(self, "uncompressed"):
             self.unpack(force=True)
+        elif self._section_cache is not None:
+            self._section_cache.touch(self)
         return self.uncompressed
 
     def set_data(self, data):
         self.uncompressed = data
         self._dirty = True
 
+    def estimate_compressed_size(self):
+        """compressed_size if the data is packed, else an estimate that does not run the compressor."""
+        if not self._dirty and hasattr(self, "compressed_size"):
+            return self.compressed_size
+        return estimate_compressed_size(self.get_data(), getattr(self, "compression_level", self._COMPRESSION_LEVEL_))
+
+    def estimate_size_of(self):
+        return self.estimate_compressed_size() + 4 + 4 + 4
+
     def size_of(self):
         return self.compressed_size + 4 + 4 + 4
\ No newline at end of file
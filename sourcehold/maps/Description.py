@@ -15,23 +15,49 @@ class Description(Structure):
     hash = Field("hash", "I")
     data = Field("data", "B", compressed_size)
 
+    #  Name of a registered compressor (see compression.get_compressor), None for compression.COMPRESSION
+    _COMPRESSOR_ = None
+    #  Default level of new sections, loaded sections keep the level of their data
+    _COMPRESSION_LEVEL_ = 6
+
+    #  See CompressedSection
+    _verify = "eager"
+    _verified = False
+
     def __init__(self):
         super().__init__()
         self._dirty = False
 
+    def from_buffer(self, buf, **kwargs):
+        super().from_buffer(buf, **kwargs)
+        if "verify" in kwargs:
+            self._verify = kwargs["verify"]
+        return self
+
     def pack(self, force = False):
+        payload = self.compression_payload(force)
+        if payload is not None:
+            self.apply_compressed(compression.get_compressor(self._COMPRESSOR_).compress(*payload))
+
+    def compression_payload(self, force = False):
         if self._dirty or force:
             if not hasattr(self, "compression_level"):
-                self.compression_level = 6
+                self.compression_level = self._COMPRESSION_LEVEL_
             if not hasattr(self, "use_string_table"):
                 self.use_string_table = 0
             if not hasattr(self, "string_table_index"):
                 self.string_table_index = 0
-            self.data = compression.COMPRESSION.compress(self.uncompressed, self.compression_level)
-            self.hash = binascii.crc32(self.uncompressed)
-            self.uncompressed_size = len(self.uncompressed)
-            self.compressed_size = len(self.data)
-            self.size = self.compressed_size + (5 * 4)
+            return self.uncompressed, self.compression_level
+        return None
+
+    def apply_compressed(self, data):
+        self.data = data
+        self.hash = binascii.crc32(self.uncompressed)
+        self.uncompressed_size = len(self.uncompressed)
+        self.compressed_size = len(self.data)
+        self._verified = True
+        self._dirty = False
+        self.size = self.compressed_size + (5 * 4)
 
     def set_description(self, string: str):
         bstring = string.encode('ascii')
@@ -41,6 +67,7 @@ class Description(Structure):
         padded = bstring + b'\x00' * (1000 - len(bstring))
         self.uncompressed = padded
         self.uncompressed = self.uncompressed[:212] + b'\x04\x00?\x00????8?8? ??' + self.uncompressed[227:]
+        self._dirty = True
         # self.description_size = len(bstring)
 
     def get_description(self):
@@ -55,13 +82,33 @@ class Description(Structure):
         return self.uncompressed[:j].decode('ascii')
 
     def unpack(self, force = False):
-        if self._dirty or force:
-            self.compression_level = self.data[1]
-            self.uncompressed = compression.COMPRESSION.decompress(self.data)
-            assert len(self.data) == self.compressed_size
-            assert len(self.uncompressed) == self.uncompressed_size
-            assert binascii.crc32(self.uncompressed) == self.hash
-            assert self.compressed_size + (5 * 4) == self.size
+        payload = self.decompression_payload(force)
+        if payload is not None:
+            uncompressed = compression.get_compressor(self._COMPRESSOR_).decompress(payload)
+            self.apply_decompressed(uncompressed, binascii.crc32(uncompressed) if self._verify == "eager" else None)
+
+    def decompression_payload(self, force = False):
+        # Edited (dirty) descriptions keep their uncompressed data unless forced
+        if force or not hasattr(self, "uncompressed"):
+            return self.data
+        return None
+
+    def apply_decompressed(self, uncompressed, crc=None):
+        self.compression_level = self.data[1]
+        self.uncompressed = uncompressed
+        self._verified = self._verified or self._verify == "off"
+        if self._verify == "eager":
+            self.verify(crc)
+        self._dirty = False
+
+    def verify(self, crc=None):
+        if crc is None:
+            crc = binascii.crc32(self.uncompressed)
+        assert len(self.data) == self.compressed_size, "compressed size mismatch"
+        assert len(self.uncompressed) == self.uncompressed_size, "uncompressed size mismatch"
+        assert crc == self.hash, "crc32 mismatch"
+        assert self.compressed_size + (5 * 4) == self.size, "size mismatch"
+        self._verified = True
 
     def get_data(self):
         if not hasattr(self, "uncompressed"):
@@ -70,6 +117,7 @@ class Description(Structure):
 
     def set_data(self, data):
         self.uncompressed = data
+        self._dirty = True
 
     def size_of(self):
         return self.compressed_size + (6 * 4)
\ No newline at end of file
@@ -1,18 +1,23 @@
+from sourcehold.compression.parallel import pack_sections, unpack_sections
 from sourcehold.iotools import read_file, write_to_file
 from sourcehold.maps import determine_version, get_section_for_index
 from sourcehold.maps.CompressedMapSection import CompressedMapSection
 from sourcehold.maps.MapSection import MapSection
+from sourcehold.maps.SectionIndex import SectionIndex, section_key
+from sourcehold.maps.SectionProxy import SectionProxy
 from sourcehold.structure_tools import bytes_to_int_array, ints_to_byte_array
 from sourcehold.structure_tools.Buffer import Buffer
+from sourcehold.structure_tools.diff import diff_sections
 from sourcehold.structure_tools.Field import Field
 from sourcehold.structure_tools.Structure import Structure
+from sourcehold.structure_tools import instrumentation
 
 
 import csv
 import logging
 import os
-import pathlib
 import struct
+import time
 
 
 class Directory(Structure):
@@ -30,25 +35,46 @@ class Directory(Structure):
     section_offsets = Field("section_offsets", "I", _MAX_SECTIONS_COUNT)
     directory_u7 = Field("directory_u7", "I")
 
+    def __init__(self):
+        super().__init__()
+        self._section_index = SectionIndex()
+
     def keys(self):
         def all_keys():
             if hasattr(self, "sections"):
                 for section in self.sections:
-                    if hasattr(section, "KEY"):
-                        yield section.KEY
+                    key = section_key(section)
+                    if key is not None:
+                        yield key
 
         return list(all_keys())
 
     def from_buffer(self, buf: Buffer, **kwargs):
         super().from_buffer(buf, **kwargs)
+        lazy = kwargs.get("lazy", False)
+        section_kwargs = {key: kwargs[key] for key in ("verify", "section_cache") if key in kwargs}
         self.sections = []
+        self._section_index.invalidate()
+        traced = instrumentation.active()
         for i in range(self.sections_count):
-            logging.debug("processing section {}".format(i))
+            logging.debug("processing section %d", i)
+            if traced:
+                bef = self._buf.tell()
+                start = time.perf_counter()
             compressed = self.section_compressed[i] == 1
             length = self.section_lengths[i]
             index = self.section_indices[i]
             type = get_section_for_index(index, compressed)
-            self.sections.append(type().from_buffer(self._buf, length=length))
+            if lazy:
+                # Only remember where the section is, it is parsed on first use.
+                offset = self._buf.tell()
+                self.sections.append(SectionProxy(type, self._buf.slice(offset, offset + length), length,
+                                                  **section_kwargs))
+                self._buf.seek(offset + length)
+            else:
+                self.sections.append(type().from_buffer(self._buf, length=length, **section_kwargs))
+            if traced:
+                instrumentation.section_event(index, "read", self._buf.tell() - bef, time.perf_counter() - start)
 
         return self
 
@@ -60,32 +86,19 @@ class Directory(Structure):
         return indices
 
     def __getitem__(self, item):
-        if type(item) == str:
-            for section in self.sections:
-                if hasattr(section, "KEY"):
-                    if item == section.KEY:
-                        return section
-        # access directory item by index
-        if not item in self.section_indices:
-            raise KeyError(item)
-        i = self.section_indices.index(item)
-        return self.sections[i]
+        # access directory item by KEY or by index
+        return self.sections[self._section_index.position(self, item)]
 
     def __setitem__(self, key, value):
-        if type(key) == str:
-            for section in self.sections:
-                if hasattr(section, "KEY"):
-                    if key == section.KEY:
-                        i = self.section_indices.index(section)
-                        self.sections[i] = value
-                        return
-        # access directory item by index
-        if not key in self.section_indices:
-            raise KeyError(key)
-        i = self.section_indices.index(key)
-        self.sections[i] = value
-
-    def unpack(self, force = False):
+        self.sections[self._section_index.position(self, key)] = value
+        self._section_index.invalidate()
+
+    def unpack(self, force = False, executor = None):
+        if executor is not None:
+            indices, sections = self.compressed_sections()
+            unpack_sections(sections, force, executor, indices)
+            force = False
+
         for section in self.sections:
             section.unpack(force)
 
@@ -93,7 +106,24 @@ class Directory(Structure):
         # TODO: more appropriate stub for yield_inequalities
         return None
 
-    def pack(self, force = False):
+    def compressed_sections(self, load = False):
+        """Section indices and the loaded (or all, if load is True) CompressedMapSections, for pack_sections etc."""
+        indices, sections = [], []
+        for i in range(len(self.sections)):
+            s = self.sections[i]
+            if isinstance(s, SectionProxy):
+                s = s.section if s.is_loaded() or load else None
+            if isinstance(s, CompressedMapSection):
+                indices.append(self.section_indices[i])
+                sections.append(s)
+        return indices, sections
+
+    def pack(self, force = False, executor = None):
+        if executor is not None:
+            indices, sections = self.compressed_sections()
+            pack_sections(sections, force, executor, indices)
+            force = False
+
         for section in self.sections:
             section.pack(force)
 
@@ -105,6 +135,9 @@ class Directory(Structure):
         self.sections_count = len(self.sections)
         for i in range(self.sections_count):
             s = self.sections[i]
+            if isinstance(s, SectionProxy):
+                # Sections that were never loaded keep their raw bytes and directory entries.
+                s = s.section if s.is_loaded() else None
             if isinstance(s, MapSection):
                 self.section_uncompressed_lengths[i] = s.size_of()
                 self.section_lengths[i] = s.size_of()
@@ -132,10 +165,17 @@ class Directory(Structure):
 
         super().serialize_to_buffer(buf)
 
+        traced = instrumentation.active()
         for i in range(len(self.sections)):  # TODO: should this not be section count?
             section = self.sections[i]
-            logging.debug("serializing section {} with size {}".format(i, self.section_lengths[i]))
+            logging.debug("serializing section %d with size %d", i, self.section_lengths[i])
+            if traced:
+                bef = buf.tell()
+                start = time.perf_counter()
             section.serialize_to_buffer(buf)
+            if traced:
+                instrumentation.section_event(self.section_indices[i], "write", buf.tell() - bef,
+                                              time.perf_counter() - start)
 
     def _dump_spec(self):
         buf = csv.StringIO()
@@ -166,22 +206,25 @@ class Directory(Structure):
 
         self.sections_count = i
 
-    def dump_to_folder(self, path):
-        if not os.path.exists(path):
-            os.makedirs(path)
+    def dump_to_folder(self, path, write=None):
+        # write replaces write_to_file, e.g. with Manifest.writer to dump into an ObjectStore
+        if write is None:
+            if not os.path.exists(path):
+                os.makedirs(path)
+            write = write_to_file
 
-        write_to_file(os.path.join(path, "spec"), self._dump_spec())
+        write(os.path.join(path, "spec"), self._dump_spec())
 
         for i in range(len(self.sections)):
-            write_to_file(os.path.join(path, str(self.section_indices[i])), self.sections[i].get_data())
+            write(os.path.join(path, str(self.section_indices[i])), self.sections[i].get_data())
 
-        write_to_file(os.path.join(path, "directory_u1"), ints_to_byte_array(self.directory_u1))
-        write_to_file(os.path.join(path, "directory_u7"), struct.pack("I", self.directory_u7))
+        write(os.path.join(path, "directory_u1"), ints_to_byte_array(self.directory_u1))
+        write(os.path.join(path, "directory_u7"), struct.pack("I", self.directory_u7))
 
-    def load_from_folder(self, path):
+    def load_from_folder(self, path, executor=None, read=read_file):
 
-        self.directory_u1 = list(bytes_to_int_array(read_file(os.path.join(path, "directory_u1"))))
-        self.directory_u7 = list(bytes_to_int_array(read_file(os.path.join(path, "directory_u7"))))[0]
+        self.directory_u1 = list(bytes_to_int_array(read(os.path.join(path, "directory_u1"))))
+        self.directory_u7 = list(bytes_to_int_array(read(os.path.join(path, "directory_u7"))))[0]
 
         self.section_uncompressed_lengths = [0] * self._MAX_SECTIONS_COUNT()
         self.section_lengths = [0] * self._MAX_SECTIONS_COUNT()
@@ -189,22 +232,23 @@ class Directory(Structure):
         self.section_compressed = [0] * self._MAX_SECTIONS_COUNT()
         self.section_offsets = [0] * self._MAX_SECTIONS_COUNT()
 
-        self._load_spec((pathlib.Path(path) / "spec").read_text('ascii'))
+        self._load_spec(bytes(read(os.path.join(path, "spec"))).decode('ascii'))
 
         self.sections = []
+        self._section_index.invalidate()
         for i in range(self.sections_count):
             sp = os.path.join(path, str(self.section_indices[i]))
 
             cls = get_section_for_index(self.section_indices[i], self.section_compressed[i] == 1)
 
             obj = cls()
-            obj.set_data(read_file(sp))
+            obj.set_data(read(sp))
 
             self.sections.append(obj)
 
         assert len(self.sections) == self.sections_count
 
-        self.pack()
+        self.pack(executor=executor)
 
         return self
 
@@ -216,23 +260,17 @@ class Directory(Structure):
 
         if self.section_indices == other.section_indices:
             for i in range(self.sections_count):
-                da = self.sections[i].get_data()
-                db = other.sections[i].get_data()
-                n = min(len(da), len(db))
-                diffs = [i for i in range(n) if da[i] != db[i]]
-                if len(diffs) > 0:
+                d = diff_sections(self.sections[i], other.sections[i])
+                if d is not None and d.count > 0:
                     yield "unequal values ({}/{} = {}) for section: {} in\n\tself: \n{}\n\tand other: \n{}".format(
-                        len(diffs), n, round(len(diffs)/n, 2),
-                        self.section_indices[i], '', '')
+                        d.count, d.n, round(d.count/d.n, 2),
+                        self.section_indices[i], d.ranges[:10], '')
 
     def different_sections(self, other):
         if self.section_indices == other.section_indices:
             for i in range(self.sections_count):
-                da = self.sections[i].get_data()
-                db = other.sections[i].get_data()
-                n = min(len(da), len(db))
-                diffs = [i for i in range(n) if da[i] != db[i]]
-                if len(diffs) > 0:
+                d = diff_sections(self.sections[i], other.sections[i])
+                if d is not None and d.count > 0:
                     yield self.section_indices[i]
         else:
             return "ALL"
\ No newline at end of file
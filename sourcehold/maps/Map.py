@@ -1,13 +1,18 @@
+from sourcehold.compression.parallel import executor_for, pack_sections, unpack_sections, verify_sections, \
+    VerificationReport
 from sourcehold.iotools import read_file, write_to_file
 from sourcehold.maps.Description import Description
 from sourcehold.maps.Directory import Directory
+from sourcehold.maps.ObjectStore import Manifest, ObjectStore
 from sourcehold.maps.Preview import Preview
+from sourcehold.maps.SectionProxy import SectionProxy
 from sourcehold.maps.U1 import U1
 from sourcehold.maps.U2 import U2
 from sourcehold.maps.U3 import U3
 from sourcehold.maps.U4 import U4
 from sourcehold.structure_tools.Buffer import Buffer
 from sourcehold.structure_tools.Field import Field
+from sourcehold.structure_tools.MemoryBuffer import MemoryBuffer
 from sourcehold.structure_tools.Structure import Structure
 
 
@@ -15,6 +20,9 @@ import os
 
 
 class Map(Structure):
+    #  Names of the sections outside of the directory, accepted by load_sections next to section indices and keys
+    MAP_SECTIONS = ("preview", "description", "u1", "u2", "u3", "u4")
+
     magic = Field("magic", "I")
     preview_size = Field("preview_size",
                          "I")  # Not sure whether to move this in Preview, or leave it here. makes sense in preview from a manipulation perspective.
@@ -28,7 +36,15 @@ class Map(Structure):
 
     directory = Field("directory", Directory)
 
-    def unpack(self, force = False):
+    def unpack(self, force = False, executor = None, workers = None):
+        with executor_for(executor, workers) as executor:
+            if executor is not None:
+                # Decompress and verify all payloads concurrently, the unpacks below only do the remaining work.
+                indices, sections = self.directory.compressed_sections()
+                unpack_sections([self.preview, self.description] + sections, force, executor,
+                                ["preview", "description"] + indices)
+                force = False
+
         self.preview.unpack(force)
         self.description.unpack(force)
         self.directory.unpack(force)
@@ -37,7 +53,32 @@ class Map(Structure):
         self.u3.unpack(force)
         self.u4.unpack(force)
 
-    def pack(self, force = False):
+    def load_sections(self, sections, unpack=True, force=False):
+        """Parses (and unpacks) only the given directory sections and map sections (see MAP_SECTIONS).
+
+        The map should be read with from_buffer(lazy=True), the other directory sections then stay unloaded and
+        serialize their raw bytes.
+        """
+        for item in sections:
+            if item in Map.MAP_SECTIONS:
+                section = getattr(self, item)
+            else:
+                section = self.directory[item]
+                if isinstance(section, SectionProxy):
+                    section = section.load()
+            if unpack:
+                section.unpack(force)
+        return self
+
+    def pack(self, force = False, executor = None, workers = None):
+        with executor_for(executor, workers) as executor:
+            if executor is not None:
+                # Compress all payloads concurrently, the packs below then only update sizes and offsets.
+                indices, sections = self.directory.compressed_sections()
+                pack_sections([self.preview, self.description] + sections, force, executor,
+                              ["preview", "description"] + indices)
+                force = False
+
         self.magic = 0xFFFFFFFF
         self.preview.pack(force)
         self.preview_size = self.preview.size_of()
@@ -50,51 +91,120 @@ class Map(Structure):
         self.u3.pack(force)
         self.u4.pack(force)
 
-    def dump_to_folder(self, path):
-        if not os.path.exists(path):
-            os.makedirs(path)
-
-        write_to_file(os.path.join(path, "preview"), self.preview.get_data())
-        write_to_file(os.path.join(path, "description"), self.description.get_data())
-        write_to_file(os.path.join(path, "u1"), self.u1.get_data())
-        write_to_file(os.path.join(path, "u2"), self.u2.get_data())
-        write_to_file(os.path.join(path, "u3"), self.u3.get_data())
-        write_to_file(os.path.join(path, "u4"), self.u4.get_data())
-        write_to_file(os.path.join(path, "ud"), bytes(bytearray(self.ud)))
-        self.directory.dump_to_folder(os.path.join(path, "sections"))
+    def verify(self, force = False, executor = None, workers = None) -> VerificationReport:
+        """Checks sizes and crc32 of all compressed payloads that were not verified yet, see load_map(verify=...).
+
+        Sections that are not decompressed yet are decompressed. With force, sections loaded with verify="off" are
+        checked as well.
+        """
+        indices, sections = self.directory.compressed_sections(load=True)
+        with executor_for(executor, workers) as executor:
+            return verify_sections([self.preview, self.description] + sections, force, executor,
+                                   ["preview", "description"] + indices)
+
+    def dump_to_folder(self, path, store: ObjectStore = None):
+        """Writes every payload to a file in path, or with store, every distinct payload once to the store and a
+        manifest of the files to path.
+        """
+        if store is None:
+            if not os.path.exists(path):
+                os.makedirs(path)
+            write, manifest = write_to_file, None
+        else:
+            manifest = Manifest(store)
+            write = manifest.writer(path)
+
+        write(os.path.join(path, "preview"), self.preview.get_data())
+        write(os.path.join(path, "description"), self.description.get_data())
+        write(os.path.join(path, "u1"), self.u1.get_data())
+        write(os.path.join(path, "u2"), self.u2.get_data())
+        write(os.path.join(path, "u3"), self.u3.get_data())
+        write(os.path.join(path, "u4"), self.u4.get_data())
+        write(os.path.join(path, "ud"), bytes(bytearray(self.ud)))
+        self.directory.dump_to_folder(os.path.join(path, "sections"), None if manifest is None else write)
+
+        if manifest is not None:
+            manifest.save(path)
+
+    def load_from_folder(self, path, executor=None, store: ObjectStore = None):
+        # Folders dumped with a store only hold a manifest, store overrides the store it refers to.
+        read = Manifest.load(path, store).reader(path) if Manifest.exists(path) else read_file
 
-    def load_from_folder(self, path):
         self.preview = Preview()
-        self.preview.set_data(read_file(os.path.join(path, "preview")))
+        self.preview.set_data(read(os.path.join(path, "preview")))
 
         self.description = Description()
-        self.description.set_data(read_file(os.path.join(path, "description")))
+        self.description.set_data(read(os.path.join(path, "description")))
 
         self.u1 = U1()
-        self.u1.set_data([v for v in read_file(os.path.join(path, "u1"))])
+        self.u1.set_data([v for v in read(os.path.join(path, "u1"))])
 
         self.u2 = U2()
-        self.u2.set_data([v for v in read_file(os.path.join(path, "u2"))])
+        self.u2.set_data([v for v in read(os.path.join(path, "u2"))])
 
         self.u3 = U3()
-        self.u3.set_data([v for v in read_file(os.path.join(path, "u3"))])
+        self.u3.set_data([v for v in read(os.path.join(path, "u3"))])
 
         self.u4 = U4()
-        self.u4.set_data([v for v in read_file(os.path.join(path, "u4"))])
+        self.u4.set_data([v for v in read(os.path.join(path, "u4"))])
 
-        self.ud = [v for v in read_file(os.path.join(path, "ud"))]
+        self.ud = [v for v in read(os.path.join(path, "ud"))]
 
         self.directory = Directory()
-        self.directory.load_from_folder(os.path.join(path, "sections"))
+        self.directory.load_from_folder(os.path.join(path, "sections"), executor, read)
 
         return self
 
-    def from_file(self, fp: str):
+    def from_file(self, fp: str, sections=None):
+        if sections is not None:
+            # Memory maps the file, only the pages of the header, the directory and the given sections are read.
+            return self.from_buffer(MemoryBuffer.from_file(fp), lazy=True).load_sections(sections)
         with open(fp, 'rb') as f:
             return self.from_buffer(Buffer(f.read()))
 
+    def close(self):
+        """Releases the file a zero-copy or lazy map was read from (see load_map), the map stays usable.
+
+        Data that still references the mapped file is copied first, unloaded sections keep their raw bytes.
+        """
+        buf = getattr(self, "_buf", None)
+        if not isinstance(buf, MemoryBuffer):
+            return
+        _detach(self, set())
+        buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def to_file(self, fp: str):
         b = Buffer()
         self.serialize_to_buffer(b)
         with open(fp, 'wb') as f:
-            f.write(b.getvalue())
\ No newline at end of file
+            f.write(b.getvalue())
+
+
+def _detach(obj, seen):
+    #  Replaces the memoryviews and buffers of obj and its child structures by copies, so none reference the mapping
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+    if obj.__class__ == SectionProxy:
+        if obj.is_loaded():
+            _detach(obj.section, seen)
+        else:
+            object.__setattr__(obj, "_buf", MemoryBuffer(obj.get_raw().tobytes()))
+        return
+    for key, value in list(obj.__dict__.items()):
+        if value.__class__ == memoryview:
+            #  Zero-copy reads keep the views that copying reads turn into bytearrays
+            obj.__dict__[key] = bytearray(value)
+        elif isinstance(value, MemoryBuffer):
+            del obj.__dict__[key]
+        elif isinstance(value, (Structure, SectionProxy)):
+            _detach(value, seen)
+        elif value.__class__ == list and value and isinstance(value[0], (Structure, SectionProxy)):
+            for o in value:
+                _detach(o, seen)
@@ -0,0 +1,113 @@
+from sourcehold.iotools import read_at
+from sourcehold.maps import determine_version
+from sourcehold.maps.Description import Description
+from sourcehold.maps.Preview import Preview
+from sourcehold.maps.U1 import U1
+from sourcehold.maps.U2 import U2
+from sourcehold.maps.U3 import U3
+from sourcehold.maps.U4 import U4
+from sourcehold.structure_tools.Buffer import Buffer
+from sourcehold.structure_tools.UnderflowException import UnderflowException
+
+
+import binascii
+import os
+import struct
+import types
+
+
+class MapMetadata(object):
+    """The header of a map file up to the directory tables, read without touching the section bodies.
+
+    preview and description are parsed but not decompressed, get_image() and get_description() decompress them.
+    """
+
+    #  First guess of the size of u1..u4, ud and the directory, read at once
+    _TAIL_SIZE = 8192
+    #  directory_size, size, sections_count and directory_u1
+    _DIRECTORY_HEADER = struct.Struct("III5I")
+    #  uncompressed_size, compressed_size and hash of a compressed section
+    _SECTION_HEADER = struct.Struct("III")
+
+    @classmethod
+    def from_file(cls, path, verify="eager"):
+        self = cls()
+        self.path = path
+        with open(path, 'rb') as f:
+            self.file_size = os.fstat(f.fileno()).st_size
+            self.magic, self.preview_size = struct.unpack("II", read_at(f, 0, 8))
+            offset = 8
+
+            self.preview = Preview().from_buffer(Buffer(read_at(f, offset, self.preview_size)), verify=verify)
+            offset += self.preview_size
+
+            description_size = struct.unpack("I", read_at(f, offset, 4))[0] + 4
+            self.description = Description().from_buffer(Buffer(read_at(f, offset, description_size)), verify=verify)
+            offset += description_size
+
+            size = cls._TAIL_SIZE
+            while True:
+                buf = Buffer(read_at(f, offset, min(size, self.file_size - offset)))
+                try:
+                    self._read_tail(buf, offset)
+                    break
+                except UnderflowException:
+                    if offset + size >= self.file_size:
+                        raise
+                    size *= 4
+        return self
+
+    def _read_tail(self, buf, offset):
+        self.u1 = U1().from_buffer(buf)
+        self.u2 = U2().from_buffer(buf)
+        self.u3 = U3().from_buffer(buf)
+        self.u4 = U4().from_buffer(buf)
+        self.ud = list(buf.read(4))
+        self.directory_offset = offset + buf.tell()
+        header = self._DIRECTORY_HEADER.unpack(buf.read(self._DIRECTORY_HEADER.size))
+        self.directory_size, self.directory_length, self.sections_count = header[:3]
+        self.directory_u1 = list(header[3:])
+        self.version = determine_version(types.SimpleNamespace(directory_u1=self.directory_u1))
+
+        tables = struct.unpack("{}I".format(5 * self.version), buf.read(5 * 4 * self.version))
+        count = self.sections_count
+        self.section_uncompressed_lengths = list(tables[0:count])
+        self.section_lengths = list(tables[self.version:self.version + count])
+        self.section_indices = list(tables[2 * self.version:2 * self.version + count])
+        self.section_compressed = list(tables[3 * self.version:3 * self.version + count])
+        self.section_offsets = list(tables[4 * self.version:4 * self.version + count])
+
+    def section_hashes(self):
+        """{section index: crc32 of the uncompressed data}.
+
+        Compressed sections store the crc32 in their header, only uncompressed sections are read entirely.
+        """
+        start = self.directory_offset + self.directory_size
+        hashes = {}
+        with open(self.path, 'rb') as f:
+            for i in range(self.sections_count):
+                offset = start + self.section_offsets[i]
+                if self.section_compressed[i] == 1:
+                    hashes[self.section_indices[i]] = self._SECTION_HEADER.unpack(
+                        read_at(f, offset, self._SECTION_HEADER.size))[2]
+                else:
+                    hashes[self.section_indices[i]] = binascii.crc32(read_at(f, offset, self.section_lengths[i]))
+        return hashes
+
+    @property
+    def game_mode(self):
+        return self.u3.int1
+
+    @property
+    def map_locked(self):
+        return self.u3.map_locked
+
+    def get_description(self):
+        self.description.get_data()
+        return self.description.get_description()
+
+    def get_image(self):
+        return self.preview.get_image()
+
+    def __repr__(self):
+        return "<MapMetadata {} (version {}, {} sections)>".format(self.path, self.version, self.sections_count)
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+import zlib
+
+
+class ObjectStore(object):
+    """Content-addressed store of payloads, every distinct payload is written once.
+
+    Objects are files named by the blake2b hash of their data under <path>/objects. With compress, new objects are
+    stored zlib compressed (with a .z suffix), both kinds are read.
+    """
+
+    def __init__(self, path, compress=False, level=6):
+        self.path = pathlib.Path(path)
+        self.compress = compress
+        self.level = level
+        self.written = 0
+
+    @staticmethod
+    def key(data):
+        return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+    def _file(self, key, compressed):
+        return self.path / "objects" / key[:2] / (key[2:] + (".z" if compressed else ""))
+
+    def __contains__(self, key):
+        return self._file(key, False).exists() or self._file(key, True).exists()
+
+    def put(self, data):
+        key = ObjectStore.key(data)
+        if key in self:
+            return key
+
+        fp = self._file(key, self.compress)
+        fp.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, concurrent writers of the same object then cannot produce a torn object.
+        fd, tmp = tempfile.mkstemp(dir=str(fp.parent))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(zlib.compress(data, self.level) if self.compress else data)
+        os.replace(tmp, str(fp))
+        self.written += 1
+        return key
+
+    def get(self, key):
+        fp = self._file(key, False)
+        if fp.exists():
+            return fp.read_bytes()
+        fp = self._file(key, True)
+        if fp.exists():
+            return zlib.decompress(fp.read_bytes())
+        raise KeyError(key)
+
+    def keys(self):
+        for fp in (self.path / "objects").glob("*/*"):
+            yield fp.parent.name + fp.name.split(".")[0]
+
+    def __len__(self):
+        return sum(1 for _ in self.keys())
+
+
+class Manifest(object):
+    """Files of a folder dump (as in Map.dump_to_folder) stored as objects, saved as <folder>/manifest.json.
+
+    writer() and reader() stand in for iotools.write_to_file and read_file, with paths inside the folder.
+    """
+
+    NAME = "manifest.json"
+
+    def __init__(self, store: ObjectStore, files=None):
+        self.store = store
+        self.files = {} if files is None else files
+
+    @staticmethod
+    def exists(folder):
+        return (pathlib.Path(folder) / Manifest.NAME).exists()
+
+    @staticmethod
+    def _name(folder, path):
+        return pathlib.Path(os.path.relpath(str(path), str(folder))).as_posix()
+
+    def writer(self, folder):
+        def write(path, data):
+            self.files[Manifest._name(folder, path)] = self.store.put(bytes(data))
+        return write
+
+    def reader(self, folder):
+        def read(path):
+            return self.store.get(self.files[Manifest._name(folder, path)])
+        return read
+
+    def save(self, folder):
+        folder = pathlib.Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        # The store is referenced relative to the folder, so an archive can be moved as a whole.
+        (folder / Manifest.NAME).write_text(json.dumps({
+            "store": pathlib.Path(os.path.relpath(str(self.store.path), str(folder))).as_posix(),
+            "files": self.files}, indent=1, sort_keys=True))
+
+    @classmethod
+    def load(cls, folder, store: ObjectStore = None):
+        folder = pathlib.Path(folder)
+        manifest = json.loads((folder / Manifest.NAME).read_text())
+        if store is None:
+            store = ObjectStore(folder / manifest["store"])
+        return cls(store, manifest["files"])
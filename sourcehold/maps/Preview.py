@@ -13,8 +13,9 @@ class Preview(CompressedSection):
     def get_image(self) -> Image:
         palette_size = 512
 
-        buff = io.BytesIO(self.uncompressed)
-        size = len(self.uncompressed)
+        data = self.get_data()
+        buff = io.BytesIO(data)
+        size = len(data)
         image_size = size - palette_size
         width = height = int(image_size ** 0.5)
 
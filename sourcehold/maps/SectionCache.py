@@ -0,0 +1,68 @@
+import collections
+import weakref
+
+
+class SectionCache(object):
+    """Keeps the decompressed payloads of compressed sections within a byte budget.
+
+    Sections loaded with from_buffer(section_cache=...) (or while SectionCache.default is set) register their payload
+    when it is decompressed. When the budget is exceeded, the least recently used payloads are dropped and
+    decompressed again by the next get_data(). Only clean payloads of type bytes are dropped: edited sections and
+    bytearray payloads, which may be shared with record views, stay resident.
+    """
+
+    #  Cache used by sections that are loaded without an explicit section_cache
+    default = None
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+
+    def track(self, section):
+        key = id(section)
+        self._drop(key)
+        size = len(section.uncompressed)
+        self._entries[key] = (weakref.ref(section, lambda ref, key=key: self._collected(key, ref)), size)
+        self.bytes += size
+        if self.bytes > self.max_bytes:
+            self._evict()
+
+    def touch(self, section):
+        key = id(section)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+
+    def forget(self, section):
+        self._drop(id(section))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+    def _collected(self, key, ref):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is ref:
+            self._drop(key)
+
+    @staticmethod
+    def _evictable(section):
+        return not section._dirty and getattr(section, "uncompressed", None).__class__ == bytes
+
+    def _evict(self):
+        # The most recent entry is the payload that is being accessed, it is never evicted.
+        for key in list(self._entries)[:-1]:
+            if self.bytes <= self.max_bytes:
+                break
+            section = self._entries[key][0]()
+            if section is None:
+                self._drop(key)
+            elif SectionCache._evictable(section):
+                del section.uncompressed
+                self._drop(key)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,56 @@
+from sourcehold.maps.SectionProxy import SectionProxy
+
+
+def section_key(section):
+    """KEY of a section (a class attribute), without loading lazy sections."""
+    cls = section.section_class if isinstance(section, SectionProxy) else type(section)
+    return getattr(cls, "KEY", None)
+
+
+class SectionIndex(object):
+    """Positions of the sections of a directory by section index and by KEY.
+
+    Every hit is checked against the directory (section_indices[i] or the KEY of sections[i]) and misses rebuild the
+    index once, so it stays correct when sections or section_indices are modified directly.
+    """
+
+    def __init__(self):
+        self._indices = None
+        self._keys = None
+
+    def invalidate(self):
+        self._indices = None
+        self._keys = None
+
+    def _build(self, directory):
+        self._indices = {}
+        self._keys = {}
+        for i in range(len(directory.sections)):
+            index = directory.section_indices[i]
+            if index != 0:
+                self._indices.setdefault(index, i)
+            key = section_key(directory.sections[i])
+            if key is not None:
+                self._keys.setdefault(key, i)
+
+    def _lookup(self, directory, item):
+        if type(item) == str:
+            i = self._keys.get(item)
+            if i is not None and i < len(directory.sections) and section_key(directory.sections[i]) == item:
+                return i
+        else:
+            i = self._indices.get(item)
+            if i is not None and i < len(directory.sections) and directory.section_indices[i] == item:
+                return i
+        return None
+
+    def position(self, directory, item):
+        if self._indices is not None:
+            i = self._lookup(directory, item)
+            if i is not None:
+                return i
+        self._build(directory)
+        i = self._lookup(directory, item)
+        if i is None:
+            raise KeyError(item)
+        return i
@@ -0,0 +1,82 @@
+class SectionProxy(object):
+    """Placeholder for a directory section that is parsed on first use.
+
+    Holds the section class and a buffer over its raw bytes. Attribute access, get_data() and item access load the
+    section and delegate to it. An unloaded proxy serializes its raw bytes unchanged.
+    """
+
+    __slots__ = ("_cls", "_buf", "_length", "_kwargs", "_section")
+
+    def __init__(self, cls, buf, length, **kwargs):
+        object.__setattr__(self, "_cls", cls)
+        object.__setattr__(self, "_buf", buf)
+        object.__setattr__(self, "_length", length)
+        object.__setattr__(self, "_kwargs", kwargs)
+        object.__setattr__(self, "_section", None)
+
+    @property
+    def section_class(self):
+        return self._cls
+
+    @property
+    def section(self):
+        return self.load()
+
+    def is_loaded(self):
+        return self._section is not None
+
+    def load(self):
+        if self._section is None:
+            self._buf.seek(0)
+            section = self._cls().from_buffer(self._buf, length=self._length, **self._kwargs)
+            object.__setattr__(self, "_section", section)
+            object.__setattr__(self, "_buf", None)
+        return self._section
+
+    def get_raw(self):
+        if self._section is not None:
+            raise Exception("section is loaded, raw bytes are no longer tracked")
+        return self._buf.getbuffer()
+
+    def get_data(self):
+        return self.load().get_data()
+
+    def set_data(self, data):
+        self.load().set_data(data)
+
+    def size_of(self):
+        if self._section is None:
+            return self._length
+        return self._section.size_of()
+
+    def pack(self, force=False):
+        if self._section is not None:
+            self._section.pack(force)
+
+    def unpack(self, force=False):
+        if self._section is not None:
+            self._section.unpack(force)
+
+    def serialize_to_buffer(self, buf):
+        if self._section is None:
+            buf.write(self._buf.getbuffer())
+        else:
+            self._section.serialize_to_buffer(buf)
+
+    def __getattr__(self, item):
+        return getattr(self.load(), item)
+
+    def __setattr__(self, key, value):
+        setattr(self.load(), key, value)
+
+    def __getitem__(self, item):
+        return self.load()[item]
+
+    def __setitem__(self, key, value):
+        self.load()[key] = value
+
+    def __len__(self):
+        return len(self.load())
+
+    def __repr__(self):
+        return "<SectionProxy {} ({}, {} bytes)>".format(self._cls.__name__, "loaded" if self.is_loaded() else "raw", self._length)
@@ -0,0 +1,176 @@
+from sourcehold.maps.MapMetadata import MapMetadata
+
+
+from PIL import Image
+
+
+import hashlib
+import io
+import logging
+import pathlib
+import sqlite3
+
+
+class Catalog(object):
+    """Persistent index of the maps and saves of a Library, in an sqlite database.
+
+    refresh() only scans files that are new or whose mtime or size changed, and drops files that are gone. Files that
+    fail to parse are recorded with their error and are not scanned again until they change.
+    """
+
+    THUMBNAIL_SIZE = (64, 64)
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (
+        path TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        magic INTEGER,
+        description TEXT,
+        map_locked INTEGER,
+        game_mode INTEGER,
+        version INTEGER,
+        sections_count INTEGER,
+        thumbnail BLOB,
+        error TEXT
+    );
+    CREATE TABLE IF NOT EXISTS sections (
+        path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+        section_index INTEGER NOT NULL,
+        crc32 INTEGER NOT NULL,
+        length INTEGER NOT NULL,
+        compressed INTEGER NOT NULL,
+        PRIMARY KEY (path, section_index)
+    );
+    CREATE INDEX IF NOT EXISTS sections_crc32 ON sections (section_index, crc32);
+    """
+
+    def __init__(self, library, path=None):
+        self.library = library
+        if path is None:
+            root = str(pathlib.Path(library._path).resolve())
+            name = hashlib.blake2b(root.encode('utf-8'), digest_size=8).hexdigest()
+            path = pathlib.Path("~").expanduser() / ".sourcehold" / "catalogs" / "{}.sqlite".format(name)
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(str(self.path))
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(Catalog._SCHEMA)
+
+    def _files(self):
+        for kind, paths in (("map", self.library.get_all_map_paths), ("sav", self.library.get_all_save_paths)):
+            try:
+                for path in paths():
+                    if path.is_file():
+                        yield kind, path
+            except FileNotFoundError:
+                pass
+
+    def refresh(self):
+        """Scans new and changed files, returns (scanned, removed, unchanged) counts."""
+        known = {row["path"]: (row["mtime_ns"], row["size"])
+                 for row in self._connection.execute("SELECT path, mtime_ns, size FROM files")}
+        scanned = unchanged = 0
+        with self._connection:
+            for kind, path in self._files():
+                stat = path.stat()
+                key = str(path)
+                if known.pop(key, None) == (stat.st_mtime_ns, stat.st_size):
+                    unchanged += 1
+                    continue
+                self._store(kind, key, stat)
+                scanned += 1
+            for key in known:
+                self._connection.execute("DELETE FROM files WHERE path = ?", (key,))
+        return scanned, len(known), unchanged
+
+    def _store(self, kind, path, stat):
+        self._connection.execute("DELETE FROM files WHERE path = ?", (path,))
+        try:
+            metadata = MapMetadata.from_file(path)
+            hashes = metadata.section_hashes()
+            thumbnail = self._thumbnail(metadata)
+            description = metadata.get_description()
+        except Exception as e:
+            logging.debug("failed to scan %s: %s", path, e)
+            self._connection.execute("INSERT INTO files (path, kind, mtime_ns, size, error) VALUES (?, ?, ?, ?, ?)",
+                                     (path, kind, stat.st_mtime_ns, stat.st_size, str(e)))
+            return
+
+        self._connection.execute(
+            "INSERT INTO files (path, kind, mtime_ns, size, magic, description, map_locked, game_mode, version, "
+            "sections_count, thumbnail) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, kind, stat.st_mtime_ns, stat.st_size, metadata.magic, description, metadata.map_locked,
+             metadata.game_mode, metadata.version, metadata.sections_count, thumbnail))
+        self._connection.executemany(
+            "INSERT INTO sections (path, section_index, crc32, length, compressed) VALUES (?, ?, ?, ?, ?)",
+            [(path, index, hashes[index], length, compressed) for index, length, compressed in
+             zip(metadata.section_indices, metadata.section_uncompressed_lengths, metadata.section_compressed)])
+
+    def _thumbnail(self, metadata):
+        image = metadata.get_image().convert("RGB")
+        image.thumbnail(Catalog.THUMBNAIL_SIZE)
+        out = io.BytesIO()
+        image.save(out, format="PNG")
+        return out.getvalue()
+
+    def get(self, path):
+        row = self._connection.execute("SELECT * FROM files WHERE path = ?", (str(path),)).fetchone()
+        return None if row is None else dict(row)
+
+    def section_hashes(self, path):
+        return {row["section_index"]: row["crc32"] for row in self._connection.execute(
+            "SELECT section_index, crc32 FROM sections WHERE path = ?", (str(path),))}
+
+    def get_thumbnail(self, path):
+        row = self._connection.execute("SELECT thumbnail FROM files WHERE path = ?", (str(path),)).fetchone()
+        if row is None or row["thumbnail"] is None:
+            return None
+        return Image.open(io.BytesIO(row["thumbnail"]))
+
+    def query(self, kind=None, locked=None, game_mode=None, description=None, section=None, crc32=None):
+        """Paths of the scanned files matching all given criteria.
+
+        description matches a substring, section and crc32 match files that have that section (with that crc32).
+        """
+        clauses, parameters = ["error IS NULL"], []
+        if kind is not None:
+            clauses.append("kind = ?")
+            parameters.append(kind)
+        if locked is not None:
+            clauses.append("map_locked != 0" if locked else "map_locked = 0")
+        if game_mode is not None:
+            clauses.append("game_mode = ?")
+            parameters.append(game_mode)
+        if description is not None:
+            clauses.append("instr(description, ?) > 0")
+            parameters.append(description)
+        if section is not None or crc32 is not None:
+            condition = "SELECT 1 FROM sections s WHERE s.path = files.path"
+            if section is not None:
+                condition += " AND s.section_index = ?"
+                parameters.append(section)
+            if crc32 is not None:
+                condition += " AND s.crc32 = ?"
+                parameters.append(crc32)
+            clauses.append("EXISTS ({})".format(condition))
+        sql = "SELECT path FROM files WHERE {} ORDER BY path".format(" AND ".join(clauses))
+        return [row["path"] for row in self._connection.execute(sql, parameters)]
+
+    def errors(self):
+        return {row["path"]: row["error"] for row in
+                self._connection.execute("SELECT path, error FROM files WHERE error IS NOT NULL")}
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
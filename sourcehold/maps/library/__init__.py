@@ -59,10 +59,15 @@ class Library(object):
     def get_all_save_paths(self):
         return [f for f in self._saves.iterdir()]
 
+    def catalog(self, path=None):
+        """Persistent Catalog of this library, stored under ~/.sourcehold/catalogs unless path is given."""
+        return Catalog(self, path)
+
 
 from pathlib import Path
 
 import sourcehold
+from sourcehold.maps.library.Catalog import Catalog
 
 SHC_FILES_USER = Library(path=Path(sourcehold.CONFIG['shc_user']))
 SHC_FILES = Library(path=Path(sourcehold.CONFIG['shc']))
@@ -3,6 +3,11 @@ from sourcehold.maps.CompressedMapSection import CompressedMapSection
 from sourcehold.maps.MapSection import MapSection
 from sourcehold.maps.sections.tools import cut
 from sourcehold.maps.sections.tools import make_image_of_data
+from sourcehold.structure_tools.records import record_view
+from collections.abc import Mapping
+import binascii
+import numpy
+import operator
 import struct
 
 
@@ -314,7 +319,7 @@ class KeyValueStructure(object):
         posa = (index + 1) * struct.calcsize(self._TYPE_)
 
         d = self._get_data()
-        dn = d[:pos] + packed + d[posa:]
+        dn = bytes(d[:pos]) + packed + bytes(d[posa:])
 
         assert len(d) == len(dn)
 
@@ -353,6 +358,69 @@ class KeyValueMapSection(KeyValueStructure, MapSection):
         return self.set_data(data)
 
 
+class ArrayItems(Mapping):
+    """Lazy index -> item mapping of an ArrayMapStructure.
+
+    Items are child structures (a parent reference and an offset) which are only created when an index is accessed,
+    and are then kept so that repeated access returns the same object.
+    """
+
+    __slots__ = ("_parent", "_items")
+
+    def __init__(self, parent):
+        self._parent = parent
+        self._items = {}
+
+    def __len__(self):
+        return self._parent._LENGTH_
+
+    def __iter__(self):
+        return iter(range(self._parent._LENGTH_))
+
+    def _index(self, item):
+        # Accepts ints and numpy integers (e.g. from numpy.flatnonzero), raises KeyError for anything else
+        try:
+            index = operator.index(item)
+        except TypeError:
+            raise KeyError(item)
+        if not 0 <= index < self._parent._LENGTH_:
+            raise KeyError(item)
+        return index
+
+    def __contains__(self, item):
+        try:
+            self._index(item)
+        except KeyError:
+            return False
+        return True
+
+    def __getitem__(self, item):
+        obj = self._items.get(item)
+        if obj is None:
+            item = self._index(item)
+            obj = self._items.get(item)
+            if obj is None:
+                typ = self._parent._TYPE_
+                obj = typ(parent=self._parent, offset=typ.size_of() * item)
+                self._items[item] = obj
+        return obj
+
+    def __setitem__(self, key, value):
+        self._items[self._index(key)] = value
+
+    def occupancy(self):
+        """Boolean numpy array, True for every item that has at least one non-zero byte."""
+        size = self._parent._TYPE_.size_of()
+        n = self._parent._LENGTH_
+        data = numpy.frombuffer(self._parent._get_data(), dtype=numpy.uint8, count=n * size)
+        return data.reshape(n, size).any(axis=1)
+
+    def occupied(self):
+        """Yields (index, item) pairs, skipping items that are all zeroes."""
+        for i in numpy.flatnonzero(self.occupancy()):
+            yield int(i), self[int(i)]
+
+
 class ArrayMapStructure(object):
     _TYPE_ = None
     _LENGTH_ = 0
@@ -381,6 +449,27 @@ class ArrayMapStructure(object):
         self.items[key] = value
         self._dirty = True
 
+    def get_records(self, writable=False):
+        """Zero-copy numpy record array over all _LENGTH_ items, with a column per DataProperty of _TYPE_.
+
+        A writable view writes straight into the section data. Since such writes cannot be tracked, requesting one
+        copies read-only data into a bytearray and marks the section as dirty. Compressed sections also compare the
+        crc32 of their data on pack, so writes through a view that was kept across a pack() are not lost.
+        """
+        data = self._get_data()
+        if writable:
+            if data.__class__ != bytearray:
+                data = bytearray(data)
+                self._set_data(data)
+            self._dirty = True
+            self._records_writable = True
+        return record_view(data, self._TYPE_, self._LENGTH_, writable)
+
+    @property
+    def records(self):
+        # Read-only, see get_records(writable=True)
+        return self.get_records()
+
     def unpack_items(self, force=False):
         # if self._dirty or force:
         #     self.items = {}
@@ -392,9 +481,7 @@ class ArrayMapStructure(object):
         #             buf.read(self._TYPE_.size_of())
         #         else:
         #             self.items[i] = self._TYPE_(parent=self, offset=self._TYPE_.size_of()*i)
-        self.items = {}
-        for i in range(self._LENGTH_):
-            self.items[i] = self._TYPE_(parent=self, offset=self._TYPE_.size_of() * i)
+        self.items = ArrayItems(self)
 
     def pack_items(self, force=False):
         pass
@@ -446,9 +533,11 @@ class ArrayMapCompressedSection(ArrayMapStructure, CompressedMapSection):
     def _set_data(self, data):
         return self.set_data(data)
 
-    def pack(self, force=False):
+    def compression_payload(self, force=False):
         self.pack_items()
-        CompressedMapSection.pack(self, force)
+        if getattr(self, "_records_writable", False) and not self._dirty and hasattr(self, "uncompressed"):
+            self._dirty = binascii.crc32(self.uncompressed) != self.hash
+        return CompressedMapSection.compression_payload(self, force)
 
     def unpack(self, force=False):
         CompressedMapSection.unpack(self, force)
@@ -34,4 +34,7 @@ class Buffer(io.BytesIO):
         return self.remaining() == 0
 
     def assert_eof(self):
-        assert self.remaining() == 0
\ No newline at end of file
+        assert self.remaining() == 0
+
+    def slice(self, start, stop):
+        return Buffer(self.getbuffer()[start:stop])
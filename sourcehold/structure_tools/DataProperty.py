@@ -1,13 +1,27 @@
 from typing import cast
-from sourcehold.structure_tools import _resolve_cls_as_type, create_structure_from_buffer
+from sourcehold.structure_tools import _resolve_cls_as_type, create_structure_from_buffer, repeat_format
 
 
 import struct
 
 from sourcehold.structure_tools.Buffer import Buffer
+from sourcehold.structure_tools.MemoryBuffer import MemoryBuffer
 from sourcehold.structure_tools.UnderflowException import UnderflowException
 
 
+def _writable_data(obj):
+    owner = getattr(obj, "_parent", obj)
+    data = obj.get_data()
+    if data.__class__ != bytearray and not (data.__class__ == memoryview and not data.readonly):
+        #  Decompressed payloads (bytes) and zero-copy views are read-only, copy on the first write.
+        #  Child structures write to their parent.
+        data = bytearray(data)
+        owner.set_data(data)
+    #  Every write marks the section dirty, also writes into a payload that was already copied and packed since.
+    owner._dirty = True
+    return data
+
+
 class DataProperty(object):
 
     def __init__(self, cls, start=0, array_size=0):
@@ -15,6 +29,12 @@ class DataProperty(object):
         self.type = cls if type(cls) != type else _resolve_cls_as_type(cls)
         self.start = start
         self.array_size = array_size
+        self._struct = None
+        if self.type.__class__ == str:
+            if self.array_size == 0:
+                self._struct = struct.Struct(self.type)
+            elif self.array_size.__class__ == int:
+                self._struct = struct.Struct(repeat_format(self.type, self.array_size))
 
     def _whats_my_name(self, obj):
         for field_name, field in type(obj).__dict__.items():
@@ -26,24 +46,48 @@ class DataProperty(object):
         self.fget = fget
         return self
 
+    def _count(self, obj):
+        if self.array_size.__class__ == int:
+            return self.array_size
+        if self.array_size.__class__.__name__ == 'function':
+            return self.array_size(obj)
+        raise Exception("Invalid size specification {}".format(self.array_size))
+
     def __get__(self, obj, objtype=None):
         if obj is None:
             return self
         #name = self._whats_my_name(obj)
-        start = self.start
-        if hasattr(obj, "_offset"):
-            start += getattr(obj, "_offset")
-        data = obj.get_data()[start:]
-        deserialized_value = self.deserialize(data)
-        return deserialized_value
+        start = self.start + getattr(obj, "_offset", 0)
+        data = obj.get_data()
+
+        if self.type.__class__ != str or self.array_size == "*":
+            return self.deserialize(memoryview(data)[start:])
+
+        if self.array_size == 0:
+            return self._struct.unpack_from(data, start)[0]
+
+        if self.type == "B":
+            #  Handle special case where we want a bytearray
+            return bytearray(memoryview(data)[start:start + self._count(obj)])
+
+        st = self._struct
+        if st is None:
+            st = struct.Struct(repeat_format(self.type, self._count(obj)))
+        return list(st.unpack_from(data, start))
 
     def __set__(self, obj, value):
         #name = self._whats_my_name(obj)
-        start = self.start
-        if hasattr(obj, "_offset"):
-            start += getattr(obj, "_offset")
-        serialized_value = self.serialize(value)
-        obj.get_data()[start:start + len(serialized_value)] = serialized_value
+        start = self.start + getattr(obj, "_offset", 0)
+
+        if self.type.__class__ != str:
+            serialized_value = self.serialize(value)
+            _writable_data(obj)[start:start + len(serialized_value)] = serialized_value
+        elif self.array_size == 0:
+            self._struct.pack_into(_writable_data(obj), start, value)
+        elif self.type == "B" and isinstance(value, (bytes, bytearray, memoryview)):
+            _writable_data(obj)[start:start + len(value)] = value
+        else:
+            struct.pack_into(repeat_format(self.type, len(value)), _writable_data(obj), start, *value)
 
     def __delete__(self, obj):
         name = self._whats_my_name(obj)
@@ -55,8 +99,7 @@ class DataProperty(object):
         return buf.getvalue()
 
     def deserialize(self, data):
-        buf = Buffer(data)
-        buf.seek(0)
+        buf = MemoryBuffer(data)
         return self.deserialize_from_buffer(buf)
 
     def serialize_to_buffer(self, buf: Buffer, value):
@@ -1,8 +1,8 @@
-from sourcehold.structure_tools import _resolve_cls_as_type, create_structure_from_buffer
+from sourcehold.structure_tools import _resolve_cls_as_type, create_structure_from_buffer, repeat_format
 
 
 import struct
-from typing import Callable, Generic, Iterable, Union, cast
+from typing import Callable, Generic, Union
 
 from sourcehold.structure_tools.BreakFunctions import BreakFunctions
 from sourcehold.structure_tools.Buffer import Buffer
@@ -12,6 +12,7 @@ from typing import TypeVar
 
 T = TypeVar("T")
 
+
 class Field(Generic[T]):
 
     def __init__(self, name, typ, array_size: Union[int, Callable, str]=0, break_array=BreakFunctions.break_at_eof):
@@ -59,112 +60,125 @@ class Field(Generic[T]):
         self.fdel = fdel
         return self
 
-    def serialize_to_buffer(self, obj, buf: Buffer):
+    def _count(self):
+        """Resolves the array size specification once, returns a callable giving the element count for an object."""
+        size = self.array_size
+        if size.__class__ == int:
+            return lambda obj: size
+        elif size.__class__ == Field:
+            return size.__get__
+        elif size.__class__.__name__ == 'function':
+            return size
+        raise Exception("Invalid size specification {}".format(size))
+
+    def _compile(self):
+        """Resolves the type and size dispatch once, returns a specialized (read, write) pair.
+
+        read has signature (obj, buf, kwargs), write has signature (obj, buf).
+        """
+        get = self.__get__
+        put = self.__set__
+
         if self.type.__class__ == str:
+            typ = self.type
+            st = struct.Struct(typ)
+            s = st.size
+            unpack = st.unpack
+            pack = st.pack
+            as_bytes = typ == "B"
+
             if self.array_size == 0:
-                r = struct.pack(self.type, self.__get__(obj))
-                buf.write(r)
+                def read(obj, buf, kwargs):
+                    put(obj, unpack(buf.read(s))[0])
+
+                def write(obj, buf):
+                    buf.write(pack(get(obj)))
+
+                return read, write
+
+            if self.array_size == "*":
+                break_array = self.break_array
+
+                def read(obj, buf, kwargs):
+                    r = []
+                    while not break_array(buf):
+                        r.append(unpack(buf.read(s))[0])
+                    put(obj, bytearray(r) if as_bytes else r)
             else:
-                if self.array_size == "*":
-                    obj = cast(Iterable, obj)
-                    for o in self.__get__(obj):
-                        buf.write(struct.pack(self.type, o))
-                elif self.array_size.__class__ == int:
-                    for o in self.__get__(obj):
-                        buf.write(struct.pack(self.type, o))
-                elif self.array_size.__class__ == Field:
-                    self.array_size.__set__(obj, len(self.__get__(obj)))
-                    for o in self.__get__(obj):
-                        buf.write(struct.pack(self.type, o))
-                elif self.array_size.__class__.__name__ == 'function':
-                    # self.array_size.__set__(obj, len(self.__get__(obj)))
-                    for o in self.__get__(obj):
-                        buf.write(struct.pack(self.type, o))
+                count = self._count()
+
+                def read(obj, buf, kwargs):
+                    n = count(obj)
+                    data = buf.read(n * s)
+                    if as_bytes:
+                        #  Treat special case where we want a bytearray instead of an array of integers.
+                        #  Zero-copy buffers hand out memoryviews, which are kept as they are.
+                        put(obj, data if data.__class__ == memoryview else bytearray(data))
+                    else:
+                        put(obj, list(struct.unpack(repeat_format(typ, n), data)))
+
+            def write_array(values, buf):
+                if as_bytes and isinstance(values, (bytes, bytearray, memoryview)):
+                    buf.write(values)
                 else:
-                    raise Exception("Invalid size specification {}".format(self.array_size))
+                    buf.write(struct.pack(repeat_format(typ, len(values)), *values))
+
+            if self.array_size.__class__ == Field:
+                size_field = self.array_size
+
+                def write(obj, buf):
+                    size_field.__set__(obj, len(get(obj)))
+                    write_array(get(obj), buf)
+            else:
+                def write(obj, buf):
+                    write_array(get(obj), buf)
+
+            return read, write
+
         elif self.type.__class__ == type:
+            typ = self.type
+
             if self.array_size == 0:
-                o = self.__get__(obj)
-                o.serialize_to_buffer(buf)
+                def read(obj, buf, kwargs):
+                    put(obj, create_structure_from_buffer(typ, buf, **kwargs))
+
+                def write(obj, buf):
+                    get(obj).serialize_to_buffer(buf)
+
+                return read, write
+
+            if self.array_size == "*":
+                break_array = self.break_array
+
+                def read(obj, buf, kwargs):
+                    r = []
+                    while not break_array(buf):
+                        r.append(create_structure_from_buffer(typ, buf, **kwargs))
+                    put(obj, r)
             else:
-                if self.array_size == "*":
-                    for o in self.__get__(obj):
-                        o.serialize_to_buffer(buf)
-                elif self.array_size.__class__ == int:
-                    for o in self.__get__(obj):
-                        o.serialize_to_buffer(buf)
-                elif self.array_size.__class__ == Field:
-                    # TODO: is there a setter missing here?
-                    for o in self.__get__(obj):
-                        o.serialize_to_buffer(buf)
-                elif self.array_size.__class__.__name__ == 'function':
-                    for o in self.__get__(obj):
-                        o.serialize_to_buffer(buf)
-                else:
-                    raise Exception("Invalid size specification {}".format(self.array_size))
-        else:
-            raise Exception("Invalid type specification {}".format(self.type))
+                count = self._count()
+
+                def read(obj, buf, kwargs):
+                    put(obj, [create_structure_from_buffer(typ, buf, **kwargs) for i in range(count(obj))])
+
+            def write(obj, buf):
+                for o in get(obj):
+                    o.serialize_to_buffer(buf)
+
+            return read, write
+
+        raise Exception("Invalid type specification {}".format(self.type))
+
+    def get_codec(self):
+        if "_codec" not in self.__dict__:
+            self._codec = self._compile()
+        return self._codec
+
+    def serialize_to_buffer(self, obj, buf: Buffer):
+        self.get_codec()[1](obj, buf)
 
     def set_from_buffer(self, obj, buf: Buffer, **kwargs):
         try:
-            if self.type.__class__ == str:
-                if self.array_size == 0:
-                    s = struct.calcsize(self.type)
-                    r = struct.unpack(self.type, buf.read(s))[0]
-                    self.__set__(obj, r)
-                else:
-                    if self.array_size == "*":
-                        s = struct.calcsize(self.type)
-                        r = []
-                        while not self.break_array(buf):
-                            r.append(struct.unpack(self.type, buf.read(s))[0])
-                        self.__set__(obj, r)
-                    elif self.array_size.__class__ == int:
-                        s = struct.calcsize(self.type)
-                        r = [struct.unpack(self.type, buf.read(s))[0] for i in range(self.array_size)]
-                        self.__set__(obj, r)
-                    elif self.array_size.__class__ == Field:
-                        si = self.array_size.__get__(obj)
-                        s = struct.calcsize(self.type)
-                        r = [struct.unpack(self.type, buf.read(s))[0] for i in range(si)]
-                        self.__set__(obj, r)
-                    elif self.array_size.__class__.__name__ == 'function':
-                        si = self.array_size(obj)
-                        s = struct.calcsize(self.type)
-                        r = [struct.unpack(self.type, buf.read(s))[0] for i in range(si)]
-                        self.__set__(obj, r)
-                    else:
-                        raise Exception("Invalid size specification {}".format(self.array_size))
-                    if self.type == "B":
-                        #  Treat special case where we want a bytearray instead of an array of integers.
-                        self.__set__(obj, bytearray(r))
-            elif self.type.__class__ == type:
-                if self.array_size == 0:
-                    r = create_structure_from_buffer(self.type, buf, **kwargs)
-                    self.__set__(obj, r)
-                else:
-                    if self.array_size == "*":
-                        s = struct.calcsize(self.type)
-                        r = []
-                        while not self.break_array(buf):
-                            r.append(create_structure_from_buffer(self.type, buf, **kwargs))
-                        self.__set__(obj, r)
-                    elif self.array_size.__class__ == int:
-                        r = [create_structure_from_buffer(self.type, buf, **kwargs) for i in range(self.array_size)]
-                        self.__set__(obj, r)
-                    elif self.array_size.__class__ == Field:
-                        si = self.array_size.__get__(obj)
-                        r = [create_structure_from_buffer(self.type, buf, **kwargs) for i in range(si)]
-                        self.__set__(obj, r)
-                    elif self.array_size.__class__.__name__ == 'function':
-                        si = self.array_size(obj)
-                        s = struct.calcsize(self.type)
-                        r = [struct.unpack(self.type, buf.read(s))[0] for i in range(si)]
-                        self.__set__(obj, r)
-                    else:
-                        raise Exception("Invalid size specification {}".format(self.array_size))
-
-            else:
-                raise Exception("Invalid type specification {}".format(self.type))
+            self.get_codec()[0](obj, buf, kwargs)
         except UnderflowException as e:
-            raise Exception("An exception occurred during the processing of {}:\n\n".format(obj, e))
\ No newline at end of file
+            raise Exception("An exception occurred during the processing of {}: {}".format(obj, e)) from e
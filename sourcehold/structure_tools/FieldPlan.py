@@ -0,0 +1,260 @@
+from sourcehold.structure_tools.Field import Field
+from sourcehold.structure_tools.UnderflowException import UnderflowException
+from sourcehold.structure_tools.instrumentation import _HOOKS, field_event
+
+
+import logging
+import struct
+import threading
+import time
+
+#  Single character formats that can be merged into one struct.Struct. Merged runs use '=' (native byte order,
+#  standard sizes, no alignment), which is only equivalent to the native format if the sizes agree.
+_MERGEABLE = "bBhHiIlLqQefd"
+
+
+def _is_mergeable(field: Field):
+    if field.type.__class__ != str or len(field.type) != 1 or field.type not in _MERGEABLE:
+        return False
+    if struct.calcsize("=" + field.type) != struct.calcsize(field.type):
+        return False
+    if field.array_size.__class__ == int:
+        return field.array_size >= 0
+    return False
+
+
+class _ReadState(threading.local):
+    #  Nesting depth of reads, and of reads that are repeated field by field to report the field that failed.
+    #  Per thread, structures are read concurrently by the section workers.
+    depth = 0
+    reporting = 0
+
+
+class FieldPlan(object):
+    """Compiled (de)serialization plan of a Structure subclass.
+
+    Field order and type dispatch are resolved once per class. Contiguous runs of primitive fields with a fixed
+    size (e.g. the header ints of Directory or Description) are merged into one struct.Struct.
+    """
+
+    _PLANS = {}
+
+    #  Classes (and their subclasses) that opted in to generated codecs, see sourcehold.structure_tools.codegen
+    codegen_classes = set()
+
+    _state = _ReadState()
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.fields = FieldPlan._collect_fields(cls)
+        self.field_steps = [(name, ) + field.get_codec() for name, field in self.fields.items()]
+        self.steps = []
+        self.generated = None
+
+        if any(c in FieldPlan.codegen_classes for c in cls.__mro__):
+            from sourcehold.structure_tools.codegen import generate_codec
+            self.generated = generate_codec(self.fields)
+
+        run = []
+        for name, field in self.fields.items():
+            if _is_mergeable(field):
+                run.append((name, field))
+                continue
+            self._flush(run)
+            run = []
+            self.steps.append((name, ) + field.get_codec())
+        self._flush(run)
+
+    @staticmethod
+    def _collect_fields(cls):
+        fields = {}
+
+        tree = list(cls.__mro__)
+
+        for c in tree:
+            if not hasattr(c, "__dict__"):
+                continue
+            props = {key: value for key, value in c.__dict__.items() if c.__dict__[key].__class__ == Field}
+            fields.update(props)
+
+        return fields
+
+    @classmethod
+    def for_class(cls, structure_cls):
+        plan = cls._PLANS.get(structure_cls)
+        if plan is None:
+            plan = cls(structure_cls)
+            cls._PLANS[structure_cls] = plan
+        return plan
+
+    @classmethod
+    def invalidate(cls, structure_cls=None):
+        """Drops cached plans, needed only if Fields are added to a class after it has been (de)serialized."""
+        if structure_cls is None:
+            cls._PLANS.clear()
+        else:
+            cls._PLANS.pop(structure_cls, None)
+
+    def _flush(self, run):
+        if len(run) == 0:
+            return
+        if len(run) == 1:
+            name, field = run[0]
+            self.steps.append((name, ) + field.get_codec())
+            return
+
+        name = ", ".join(n for n, f in run)
+        self.steps.append((name, ) + FieldPlan._compile_run([f for n, f in run]))
+
+    @staticmethod
+    def _compile_run(fields):
+        st = struct.Struct("=" + "".join(str(f.array_size) + f.type if f.array_size else f.type for f in fields))
+        size = st.size
+        unpack = st.unpack
+        pack = st.pack
+        fallback = [f.get_codec()[1] for f in fields]
+
+        layout = []
+        position = 0
+        for f in fields:
+            layout.append(("_" + f.name, position, f.array_size, f.type == "B"))
+            position += f.array_size if f.array_size else 1
+
+        if all(count == 0 for key, position, count, as_bytes in layout):
+            keys = [key for key, position, count, as_bytes in layout]
+
+            def read(obj, buf, kwargs):
+                try:
+                    obj.__dict__.update(zip(keys, unpack(buf.read(size))))
+                except UnderflowException as e:
+                    raise Exception("An exception occurred during the processing of {}: {}".format(obj, e)) from e
+
+            def write(obj, buf):
+                d = obj.__dict__
+                try:
+                    buf.write(pack(*[d[key] for key in keys]))
+                except (KeyError, struct.error):
+                    for w in fallback:
+                        w(obj, buf)
+
+            return read, write
+
+        def read(obj, buf, kwargs):
+            try:
+                values = unpack(buf.read(size))
+            except UnderflowException as e:
+                raise Exception("An exception occurred during the processing of {}: {}".format(obj, e)) from e
+            d = obj.__dict__
+            for key, position, count, as_bytes in layout:
+                if count == 0:
+                    d[key] = values[position]
+                elif as_bytes:
+                    d[key] = bytearray(values[position:position + count])
+                else:
+                    d[key] = list(values[position:position + count])
+
+        def write(obj, buf):
+            d = obj.__dict__
+            values = []
+            try:
+                for key, position, count, as_bytes in layout:
+                    if count == 0:
+                        values.append(d[key])
+                    else:
+                        values.extend(d[key])
+                buf.write(pack(*values))
+            except (KeyError, struct.error):
+                #  Missing attributes or arrays that changed length are handled (and reported) field by field.
+                for w in fallback:
+                    w(obj, buf)
+
+        return read, write
+
+    def read(self, obj, buf, kwargs):
+        if _HOOKS or logging.root.isEnabledFor(logging.DEBUG):
+            return self._read_traced(obj, buf, kwargs)
+        state = FieldPlan._state
+        if state.reporting:
+            return self._read_fields(obj, buf, kwargs)
+
+        start = buf.tell()
+        state.depth += 1
+        try:
+            if self.generated is not None:
+                self.generated.read(obj, buf, kwargs)
+            else:
+                for name, read, write in self.steps:
+                    read(obj, buf, kwargs)
+        except Exception:
+            if state.depth > 1:
+                raise
+            # Merged runs and generated codecs do not know which field failed. The outermost structure is read again
+            # field by field, nested structures included, so every level reports the field that failed.
+            state.reporting += 1
+            try:
+                buf.seek(start)
+                self._read_fields(obj, buf, kwargs)
+            finally:
+                state.reporting -= 1
+            raise
+        finally:
+            state.depth -= 1
+
+    def _read_fields(self, obj, buf, kwargs):
+        for name, read, write in self.field_steps:
+            try:
+                read(obj, buf, kwargs)
+            except Exception as e:
+                print("An error occurred while loading {}, at property {}".format(type(obj).__name__, name))
+                raise e
+
+    def write(self, obj, buf):
+        if _HOOKS or logging.root.isEnabledFor(logging.DEBUG):
+            return self._write_traced(obj, buf)
+        if self.generated is not None:
+            return self.generated.write(obj, buf)
+
+        for name, read, write in self.steps:
+            write(obj, buf)
+
+    #  Field by field paths, only taken when instrumentation hooks are registered or debug logging is on.
+
+    def _read_traced(self, obj, buf, kwargs):
+        debug = logging.root.isEnabledFor(logging.DEBUG)
+        for name, read, write in self.field_steps:
+            bef = buf.tell()
+            start = time.perf_counter()
+            try:
+                read(obj, buf, kwargs)
+            except Exception as e:
+                print("An error occurred while loading {}, at property {}".format(type(obj).__name__, name))
+                raise e
+            elapsed = time.perf_counter() - start
+            aft = buf.tell()
+            if _HOOKS:
+                field_event(obj, name, "read", aft - bef, elapsed)
+            if debug:
+                logging.debug("deserialized {:14s}. length: {:10d} before: {:10d},  after: {:10d}".format(
+                    name,
+                    aft - bef,
+                    bef,
+                    aft
+                ))
+
+    def _write_traced(self, obj, buf):
+        debug = logging.root.isEnabledFor(logging.DEBUG)
+        for name, read, write in self.field_steps:
+            bef = buf.tell()
+            start = time.perf_counter()
+            write(obj, buf)
+            elapsed = time.perf_counter() - start
+            aft = buf.tell()
+            if _HOOKS:
+                field_event(obj, name, "write", aft - bef, elapsed)
+            if debug:
+                logging.debug("serialized {:16s}. length: {:10d} before: {:10d},  after: {:10d}".format(
+                    name,
+                    aft - bef,
+                    bef,
+                    aft
+                ))
@@ -0,0 +1,107 @@
+from sourcehold.structure_tools.UnderflowException import UnderflowException
+
+
+import io
+import mmap
+import os
+
+
+class MemoryBuffer(object):
+    """Read-only counterpart of Buffer over a memoryview.
+
+    read() and peek() return zero-copy memoryview slices of the underlying data, which can be an mmap of a file
+    (see from_file). The views are read-only, callers that mutate data have to copy it first.
+    """
+
+    #  The mmap and path of buffers made by from_file, closed by close()
+    _mmap = None
+    path = None
+
+    def __init__(self, initial_bytes=b''):
+        self._view = memoryview(initial_bytes).cast('B')
+        self._position = 0
+        self.bytes_length = len(self._view)
+
+    @classmethod
+    def from_file(cls, path, use_mmap=True):
+        with open(path, 'rb') as f:
+            if not use_mmap or os.fstat(f.fileno()).st_size == 0:
+                buf = cls(f.read())
+            else:
+                buf = cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+                buf._mmap = buf._view.obj
+        buf.path = str(path)
+        return buf
+
+    def close(self):
+        """Releases the view, and the mapping of a buffer made by from_file.
+
+        Fails if slices or read() views of the mapping are still referenced, see Map.close.
+        """
+        self._view.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                raise Exception("{} is still referenced and can not be closed".format(self.path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def read(self, size=-1):
+        start = self._position
+        if size is None or size < 0:
+            stop = self.bytes_length
+        else:
+            stop = min(start + size, self.bytes_length)
+        d = self._view[start:stop]
+        self._position = stop
+        if size is not None and len(d) < size:
+            raise UnderflowException("Data underflow. Expected {} bytes, but got {}".format(size, len(d)))
+        return d
+
+    def write(self, b):
+        raise io.UnsupportedOperation("MemoryBuffer is read-only")
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.bytes_length + offset
+        else:
+            raise ValueError("Invalid whence: {}".format(whence))
+        if position < 0:
+            raise ValueError("Negative seek position {}".format(position))
+        self._position = position
+        return position
+
+    def tell(self):
+        return self._position
+
+    def remaining(self):
+        return self.bytes_length - self.tell()
+
+    def peek(self, size=1):
+        d = self.read(size)
+        self.seek(self.tell() - len(d))
+        return d
+
+    def eof(self):
+        return self.remaining() == 0
+
+    def assert_eof(self):
+        assert self.remaining() == 0
+
+    def getbuffer(self):
+        return self._view
+
+    def getvalue(self):
+        return self._view.tobytes()
+
+    def slice(self, start, stop):
+        return MemoryBuffer(self._view[start:stop])
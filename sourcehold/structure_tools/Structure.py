@@ -1,10 +1,10 @@
 from typing import Dict
 from sourcehold.structure_tools.Buffer import Buffer
 from sourcehold.structure_tools.DataProperty import DataProperty
+from sourcehold.structure_tools.FieldPlan import FieldPlan
+from sourcehold.structure_tools.diff import checksums_equal, diff_data
 
 
-import logging
-
 from sourcehold.structure_tools.Field import Field
 
 
@@ -23,17 +23,11 @@ class Structure(object):
 
     @classmethod
     def get_fields(cls) -> Dict[str, Field]:
-        fields = {}
-
-        tree = list(cls.__mro__)
+        return dict(cls.get_plan().fields)
 
-        for c in tree:
-            if not hasattr(c, "__dict__"):
-                continue
-            props = {key: value for key, value in c.__dict__.items() if c.__dict__[key].__class__ == Field}
-            fields.update(props)
-
-        return fields
+    @classmethod
+    def get_plan(cls) -> FieldPlan:
+        return FieldPlan.for_class(cls)
 
     @classmethod
     def get_data_properties(cls):
@@ -63,41 +57,13 @@ class Structure(object):
 
     def from_buffer(self, buf: Buffer, **kwargs):
         self._buf = buf
-        props = self.__class__.get_fields()
-        for name, prop in props.items():
-            # print("setting {}. buf is at {}".format(prop, buf.tell()))
-            bef = buf.tell()
-            try:
-                prop.set_from_buffer(self, buf, **kwargs)
-            except Exception as e:
-                print("An error occurred while loading {}, at property {}".format(type(self).__name__, name))
-                raise e
-            aft = buf.tell()
-            l = aft - bef
-            logging.debug("deserialized {:14s}. length: {:10d} before: {:10d},  after: {:10d}".format(
-                name,
-                l,
-                bef,
-                aft
-            ))
+        self.__class__.get_plan().read(self, buf, kwargs)
 
         return self
 
     def serialize_to_buffer(self, buf: Buffer):
 #        self.pack()
-        props = self.__class__.get_fields()
-        for name, prop in props.items():
-            # print("serializing {}. buf is at {}".format(prop, buf.tell()))
-            bef = buf.tell()
-            prop.serialize_to_buffer(self, buf)
-            aft = buf.tell()
-            l = aft - bef
-            logging.debug("serialized {:16s}. length: {:10d} before: {:10d},  after: {:10d}".format(
-                name,
-                l,
-                bef,
-                aft
-            ))
+        self.__class__.get_plan().write(self, buf)
 
     def yield_inequalities(self, other, with_pack=False, ignore_keys=None):
 
@@ -145,12 +111,13 @@ class Structure(object):
                 for ineq in a.yield_inequalities(b, False, ignore_keys):
                     yield "inside {}:\n\t{}".format(key, ineq)
 
-                if a.get_data() != b.get_data():
-                    da = a.get_data()
-                    db = b.get_data()
-                    n = min(len(da), len(db))
-                    diffs = [i for i in range(n) if da[i] != db[i]]
-                    yield "unequal data ({}/{} = {}) for key: {} in\n\tself: \n{}\n\tand other: \n{}".format(len(diffs), n, round(len(diffs)/n, 2), key, '', '')
+                if checksums_equal(a, b):
+                    continue
+                da = a.get_data()
+                db = b.get_data()
+                if da != db:
+                    d = diff_data(da, db)
+                    yield "unequal data ({}/{} = {}) for key: {} in\n\tself: \n{}\n\tand other: \n{}".format(d.count, d.n, round(d.count/d.n, 2) if d.n else 0, key, d.ranges[:10], '')
             elif a != b:
                 yield "unequal values for key: {} in\n\tself: \n{}\n\tand other: \n{}".format(key, a, b)
 
@@ -184,7 +151,7 @@ class Structure(object):
         n1 = len(d1)
         if n0 != n1:
             yield "unequal data sizes: {} {}".format(n0, n1)
-        n = min(n0, n1)
-        for i in range(n):
-            if d0[n] != d1[n]:
-                yield "unequal values at index: {}, value 0: {}, value 1: {}".format(n, d0[n], d1[n])
\ No newline at end of file
+        d = diff_data(d0, d1)
+        for start, stop in d.ranges:
+            for i in range(start, stop):
+                yield "unequal values at index: {}, value 0: {}, value 1: {}".format(i, d0[i], d1[i])
@@ -1,5 +1,6 @@
 
 from sourcehold.structure_tools.Buffer import Buffer
+from sourcehold.structure_tools.MemoryBuffer import MemoryBuffer
 from sourcehold.structure_tools.Table import Table
 
 
@@ -31,6 +32,13 @@ def _resolve_cls_as_type(cls) -> str:
         return "B"
     return cls
 
+def repeat_format(fmt: str, n: int):
+    """Format string for n consecutive values of the single value format fmt, e.g. ('<I', 3) -> '<3I'."""
+    if fmt[:1] in "@=<>!":
+        return fmt[0] + str(n) + fmt[1:]
+    return str(n) + fmt
+
+
 def create_structure_from_buffer(structure: type, buf: Buffer, **kwargs):
     self = structure()
 
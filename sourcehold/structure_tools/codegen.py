@@ -0,0 +1,151 @@
+import struct
+
+from sourcehold.structure_tools import create_structure_from_buffer, repeat_format
+from sourcehold.structure_tools.Field import Field
+from sourcehold.structure_tools.FieldPlan import FieldPlan, _is_mergeable
+
+
+class GeneratedCodec(object):
+
+    def __init__(self, read, write, source):
+        self.read = read
+        self.write = write
+        self.source = source
+
+
+_CODECS = {}
+
+
+def enable_generated_codecs(*classes):
+    """Opt in to generated codecs for the given Structure classes and their subclasses (with the same Fields)."""
+    FieldPlan.codegen_classes.update(classes)
+    FieldPlan.invalidate()
+
+
+def disable_generated_codecs(*classes):
+    if len(classes) == 0:
+        FieldPlan.codegen_classes.clear()
+    else:
+        FieldPlan.codegen_classes.difference_update(classes)
+    FieldPlan.invalidate()
+
+
+def generate_codec(fields) -> GeneratedCodec:
+    """Emits specialized read(obj, buf, kwargs) and write(obj, buf) functions for an ordered dict of Fields.
+
+    All struct formats are inlined. There is no per-field exception handling, logging or position bookkeeping.
+    Codecs are cached by the Field objects, so subclasses that do not add Fields share them.
+    """
+    key = tuple(fields.values())
+    codec = _CODECS.get(key)
+    if codec is None:
+        codec = _CodecWriter(list(fields.values())).build()
+        _CODECS[key] = codec
+    return codec
+
+
+class _CodecWriter(object):
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.constants = {"_create": create_structure_from_buffer, "_unpack": struct.unpack, "_pack": struct.pack,
+                          "_repeat": repeat_format, "_memoryview": memoryview, "_bytearray": bytearray}
+        self.reader = ["def read(obj, buf, kwargs):", "    d = obj.__dict__", "    read = buf.read"]
+        self.writer = ["def write(obj, buf):", "    d = obj.__dict__", "    write = buf.write"]
+
+    def constant(self, value):
+        name = "_c{}".format(len(self.constants))
+        self.constants[name] = value
+        return name
+
+    def build(self):
+        run = []
+        for field in self.fields:
+            if _is_mergeable(field):
+                run.append(field)
+                continue
+            self.emit_run(run)
+            run = []
+            self.emit_field(field)
+        self.emit_run(run)
+
+        source = "\n".join(self.reader) + "\n\n\n" + "\n".join(self.writer) + "\n"
+        namespace = dict(self.constants)
+        exec(compile(source, "<generated codec>", "exec"), namespace)
+        return GeneratedCodec(namespace["read"], namespace["write"], source)
+
+    def emit_run(self, run):
+        if len(run) == 0:
+            return
+
+        st = struct.Struct("=" + "".join(str(f.array_size) + f.type if f.array_size else f.type for f in run))
+        s = self.constant(st)
+
+        if all(f.array_size == 0 for f in run):
+            targets = ", ".join('d["_{}"]'.format(f.name) for f in run)
+            if len(run) == 1:
+                targets += ","
+            self.reader.append("    {} = {}.unpack(read({}))".format(targets, s, st.size))
+            self.writer.append("    write({}.pack({}))".format(s, targets.rstrip(",")))
+            return
+
+        self.reader.append("    v = {}.unpack(read({}))".format(s, st.size))
+        values = []
+        position = 0
+        for f in run:
+            if f.array_size == 0:
+                self.reader.append('    d["_{}"] = v[{}]'.format(f.name, position))
+                values.append('d["_{}"]'.format(f.name))
+                position += 1
+            else:
+                wrap = "_bytearray" if f.type == "B" else "list"
+                self.reader.append('    d["_{}"] = {}(v[{}:{}])'.format(f.name, wrap, position, position + f.array_size))
+                values.append('*d["_{}"]'.format(f.name))
+                position += f.array_size
+        self.writer.append("    write({}.pack({}))".format(s, ", ".join(values)))
+
+    def emit_field(self, field: Field):
+        key = '"_{}"'.format(field.name)
+
+        if field.type.__class__ == type and field.array_size == 0:
+            t = self.constant(field.type)
+            self.reader.append("    d[{}] = _create({}, buf, **kwargs)".format(key, t))
+            self.writer.append("    d[{}].serialize_to_buffer(buf)".format(key))
+            return
+
+        if field.type.__class__ != str or field.array_size == "*":
+            # Rare layouts (structure arrays, arrays up to a break condition) use the compiled field codec.
+            read, write = field.get_codec()
+            self.reader.append("    {}(obj, buf, kwargs)".format(self.constant(read)))
+            self.writer.append("    {}(obj, buf)".format(self.constant(write)))
+            return
+
+        st = struct.Struct(field.type)
+        if field.array_size == 0:
+            s = self.constant(st)
+            self.reader.append("    d[{}], = {}.unpack(read({}))".format(key, s, st.size))
+            self.writer.append("    write({}.pack(d[{}]))".format(s, key))
+            return
+
+        if field.array_size.__class__ == int:
+            count = str(field.array_size)
+        elif field.array_size.__class__ == Field:
+            count = 'd["_{}"]'.format(field.array_size.name)
+        else:
+            count = "{}(obj)".format(self.constant(field.array_size))
+
+        self.reader.append("    n = {}".format(count))
+        if field.type == "B":
+            self.reader.append("    v = read(n)")
+            self.reader.append("    d[{}] = v if v.__class__ == _memoryview else _bytearray(v)".format(key))
+        else:
+            fmt = self.constant(field.type)
+            self.reader.append("    d[{}] = list(_unpack(_repeat({}, n), read(n * {})))".format(key, fmt, st.size))
+
+        self.writer.append("    v = d[{}]".format(key))
+        if field.array_size.__class__ == Field:
+            self.writer.append('    d["_{}"] = len(v)'.format(field.array_size.name))
+        if field.type == "B":
+            self.writer.append("    write(v if v.__class__ in (bytes, _bytearray, _memoryview) else _pack(_repeat('B', len(v)), *v))")
+        else:
+            self.writer.append("    write(_pack(_repeat({}, len(v)), *v))".format(self.constant(field.type)))
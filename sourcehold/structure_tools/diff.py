@@ -0,0 +1,91 @@
+import struct
+
+import numpy
+
+
+class DataDiff(object):
+    """Differences between two payloads, counted in elements of fmt.
+
+    ranges holds run-length encoded (start, stop) element index pairs of differing elements.
+    """
+
+    def __init__(self, fmt, n, count, ranges, length_a, length_b):
+        self.fmt = fmt
+        self.n = n
+        self.count = count
+        self.ranges = ranges
+        self.length_a = length_a
+        self.length_b = length_b
+
+    def __bool__(self):
+        return self.count > 0 or self.length_a != self.length_b
+
+    def byte_ranges(self):
+        size = struct.calcsize(self.fmt)
+        return [(start * size, stop * size) for start, stop in self.ranges]
+
+    def __repr__(self):
+        return "DataDiff({}/{} {} values differ in {} ranges)".format(self.count, self.n, self.fmt, len(self.ranges))
+
+
+def _as_buffer(data):
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return data
+    return bytes(bytearray(data))
+
+
+def diff_data(a, b, fmt="B") -> DataDiff:
+    """Compares two payloads as arrays of fmt values (e.g. 'H' for tile sections) using numpy XOR."""
+    a = _as_buffer(a)
+    b = _as_buffer(b)
+    dtype = numpy.dtype(fmt)
+    n = min(len(a), len(b)) // dtype.itemsize
+
+    va = numpy.frombuffer(a, dtype=dtype, count=n)
+    vb = numpy.frombuffer(b, dtype=dtype, count=n)
+    mask = numpy.bitwise_xor(va, vb) != 0
+
+    edges = numpy.flatnonzero(numpy.diff(numpy.concatenate(([False], mask, [False])).astype(numpy.int8)))
+    ranges = [(int(start), int(stop)) for start, stop in zip(edges[::2], edges[1::2])]
+    count = sum(stop - start for start, stop in ranges)
+
+    return DataDiff(fmt, n, count, ranges, len(a), len(b))
+
+
+def _stored_checksum(section):
+    """(hash, uncompressed_size) stored in a compressed section header, or None if unknown or stale."""
+    if getattr(section, "_dirty", True):
+        return None
+    crc = getattr(section, "hash", None)
+    size = getattr(section, "uncompressed_size", None)
+    if crc is None or size is None:
+        return None
+    return crc, size
+
+
+def checksums_equal(a, b):
+    """Compares the stored CRC32 and size of two compressed sections without decompressing anything.
+
+    Returns True or False, or None if either section has no (up to date) stored checksum. Equal checksums are taken
+    to mean equal data.
+    """
+    ca = _stored_checksum(a)
+    cb = _stored_checksum(b)
+    if ca is None or cb is None:
+        return None
+    return ca == cb
+
+
+def section_format(section):
+    fmt = getattr(section, "_TYPE_", "B")
+    if fmt.__class__ == str and fmt in ("B", "H", "I"):
+        return fmt
+    return "B"
+
+
+def diff_sections(a, b) -> DataDiff:
+    """Diff of two sections, short-circuited by their stored checksums. Returns None if they are equal."""
+    if checksums_equal(a, b):
+        return None
+    d = diff_data(a.get_data(), b.get_data(), section_format(a))
+    return d if d else None
@@ -0,0 +1,95 @@
+import contextlib
+
+
+#  Registered hooks. FieldPlan and Directory only take their traced code paths if this list is not empty.
+_HOOKS = []
+
+
+class Report(object):
+    """Collects byte counts and wall time of (de)serialization events.
+
+    fields maps (structure name, field name, action) and sections maps (section index, action) to [calls, bytes,
+    seconds], where action is "read" or "write". Times of structure fields include the time of their children.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self.sections = {}
+
+    @staticmethod
+    def _add(stats, key, nbytes, seconds):
+        entry = stats.get(key)
+        if entry is None:
+            entry = [0, 0, 0.0]
+            stats[key] = entry
+        entry[0] += 1
+        entry[1] += nbytes
+        entry[2] += seconds
+
+    def on_field(self, obj, name, action, nbytes, seconds):
+        Report._add(self.fields, (type(obj).__name__, name, action), nbytes, seconds)
+
+    def on_section(self, index, action, nbytes, seconds):
+        Report._add(self.sections, (index, action), nbytes, seconds)
+
+    def top_fields(self, n=10):
+        return sorted(self.fields.items(), key=lambda item: item[1][2], reverse=True)[:n]
+
+    def top_sections(self, n=10):
+        return sorted(self.sections.items(), key=lambda item: item[1][2], reverse=True)[:n]
+
+    def summary(self, n=10):
+        lines = ["{:>8s} {:6s} {:>8s} {:>12s} {:>10s}".format("section", "action", "calls", "bytes", "ms")]
+        for (index, action), (calls, nbytes, seconds) in self.top_sections(n):
+            lines.append("{:>8} {:6s} {:8d} {:12d} {:10.3f}".format(index, action, calls, nbytes, seconds * 1000))
+        lines.append("")
+        lines.append("{:>40s} {:6s} {:>8s} {:>12s} {:>10s}".format("field", "action", "calls", "bytes", "ms"))
+        for (structure, name, action), (calls, nbytes, seconds) in self.top_fields(n):
+            lines.append("{:>40s} {:6s} {:8d} {:12d} {:10.3f}".format(
+                structure + "." + name, action, calls, nbytes, seconds * 1000))
+        return "\n".join(lines)
+
+
+def register_hook(hook):
+    """Registers an object with on_field(obj, name, action, nbytes, seconds) and
+    on_section(index, action, nbytes, seconds) methods, e.g. a Report."""
+    if hook not in _HOOKS:
+        _HOOKS.append(hook)
+    return hook
+
+
+def unregister_hook(hook):
+    if hook in _HOOKS:
+        _HOOKS.remove(hook)
+
+
+def active():
+    return len(_HOOKS) > 0
+
+
+def field_event(obj, name, action, nbytes, seconds):
+    for hook in _HOOKS:
+        hook.on_field(obj, name, action, nbytes, seconds)
+
+
+def section_event(index, action, nbytes, seconds):
+    for hook in _HOOKS:
+        hook.on_section(index, action, nbytes, seconds)
+
+
+@contextlib.contextmanager
+def instrument(report=None):
+    """Collects a Report for everything (de)serialized inside the with block.
+
+    with instrument() as report:
+        load_map(path)
+    print(report.summary())
+    """
+    if report is None:
+        report = Report()
+    register_hook(report)
+    try:
+        yield report
+    finally:
+        unregister_hook(report)
+
@@ -0,0 +1,48 @@
+import numpy
+
+from sourcehold.structure_tools.DataProperty import DataProperty
+
+
+def dtype_for_structure(cls) -> numpy.dtype:
+    """Builds a numpy structured dtype from the primitive DataProperty definitions of a fixed-size structure.
+
+    Fields are placed at their DataProperty start offsets and may overlap (e.g. PlayerData.data covers the whole
+    record). Properties of structure types or with a dynamic array size are left out.
+    """
+    itemsize = cls.size_of()
+
+    names, formats, offsets = [], [], []
+    properties = cls.get_data_properties()
+    for name in sorted(properties, key=lambda n: properties[n].start):
+        prop: DataProperty = properties[name]
+        if prop.type.__class__ != str:
+            continue
+        if prop.array_size == 0:
+            fmt = numpy.dtype(prop.type)
+        elif prop.array_size.__class__ == int:
+            fmt = numpy.dtype((numpy.dtype(prop.type), (prop.array_size, )))
+        else:
+            continue
+        if prop.start + fmt.itemsize > itemsize:
+            raise Exception("DataProperty {} of {} exceeds the record size {}".format(name, cls.__name__, itemsize))
+        names.append(name)
+        formats.append(fmt)
+        offsets.append(prop.start)
+
+    return numpy.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': itemsize})
+
+
+_DTYPES = {}
+
+
+def record_view(data, cls, count, writable=False) -> numpy.ndarray:
+    """Zero-copy record array over count consecutive records of type cls at the start of data."""
+    dtype = _DTYPES.get(cls)
+    if dtype is None:
+        dtype = dtype_for_structure(cls)
+        _DTYPES[cls] = dtype
+
+    records = numpy.frombuffer(data, dtype=dtype, count=count)
+    if not writable:
+        records.flags.writeable = False
+    return records
@@ -0,0 +1,143 @@
+# Unpacks or packs many map files in a process pool, one file per job.
+#
+# python -m sourcehold map file --unpack --in campaign/*.map --out unpacked --jobs 4 --report report.json
+import json
+import pathlib
+import time
+import traceback
+
+from sourcehold import load_map, save_map
+from sourcehold.compression.parallel import executor_for
+from sourcehold.maps.Map import Map
+
+MAP_EXTENSIONS = (".map", ".sav", ".msv")
+#  Name of the file in an unpacked folder that holds the extension of the map file it was unpacked from
+EXTENSION_FILE = "extension"
+
+
+def destination(action, path, output, extension=None):
+    """Folder that unpack_file, or file that pack_file, writes the map file or folder at path to."""
+    path = pathlib.Path(path)
+    if action == "unpack":
+        return pathlib.Path(output) / path.name.split(".")[0]
+
+    recorded = path / EXTENSION_FILE
+    recorded = recorded.read_text().strip() if recorded.exists() else None
+    if extension is not None and recorded is not None and extension.lower() != recorded.lower():
+        raise Exception("{} was unpacked from a {} file, not {}".format(path, recorded, extension))
+    extension = extension or recorded or ".map"
+    return pathlib.Path(output) / (path.name if path.suffix.lower() in MAP_EXTENSIONS else path.name + extension)
+
+
+def unpack_file(path, output):
+    """Dumps the map file at path to the folder output/<name>, returns the number of bytes read."""
+    path = pathlib.Path(path)
+    m = load_map(str(path))
+    dst = destination("unpack", path, output)
+    m.dump_to_folder(str(dst))
+    (dst / EXTENSION_FILE).write_text(path.suffix)
+    return path.stat().st_size
+
+
+def pack_file(path, output, extension=None):
+    """Packs the folder at path to the file output/<folder name><extension>, returns the number of bytes written.
+
+    The extension defaults to the one recorded by unpack_file, or .map. An extension that differs from the recorded
+    one is rejected.
+    """
+    dst = destination("pack", path, output, extension)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    m = Map().load_from_folder(str(path))
+    # load_from_folder compressed the directory sections, only the map sections are left
+    m.pack()
+    save_map(m, str(dst))
+    return dst.stat().st_size
+
+
+def _failure(path, e, start):
+    # Structure errors wrap the exception of the field that failed, report that one
+    while (e.__cause__ or e.__context__) is not None:
+        e = e.__cause__ or e.__context__
+    return {"input": str(path), "ok": False, "error": "{}: {}".format(type(e).__name__, e), "bytes": 0,
+            "traceback": traceback.format_exc(), "seconds": time.perf_counter() - start}
+
+
+def _run(task):
+    # Runs in a worker process, failures are reported instead of raised so one bad file does not abort the batch.
+    action, path, output, extension = task
+    start = time.perf_counter()
+    try:
+        if action == "unpack":
+            size = unpack_file(path, output)
+        else:
+            size = pack_file(path, output, extension)
+    except Exception as e:
+        return _failure(path, e, start)
+    return {"input": str(path), "ok": True, "error": None, "bytes": size, "seconds": time.perf_counter() - start}
+
+
+def run_batch(action, paths, output, jobs=None, extension=None, executor=None):
+    """Unpacks (or packs) all paths with jobs processes, returns a report with one entry per path, in input order.
+
+    output is a folder, unpacked maps become folders in it and packed folders become files in it (see pack_file).
+    Inputs that would be written to the same destination (e.g. a.map and a.sav) all fail without being processed.
+    """
+    if action not in ("unpack", "pack"):
+        raise Exception("Unknown batch action: {}".format(action))
+
+    start = time.perf_counter()
+    results = [None] * len(paths)
+    destinations = {}
+    for i, path in enumerate(paths):
+        try:
+            # Lower case, destinations that differ only in case are the same on Windows
+            destinations.setdefault(str(destination(action, path, output, extension)).lower(), []).append(i)
+        except Exception as e:
+            results[i] = _failure(path, e, start)
+    for dst, indices in destinations.items():
+        if len(indices) > 1:
+            for i in indices:
+                others = ", ".join(str(paths[j]) for j in indices if j != i)
+                error = "Exception: {} has the same destination as {}".format(paths[i], others)
+                results[i] = {"input": str(paths[i]), "ok": False, "error": error, "bytes": 0, "seconds": 0.0}
+
+    pending = [i for i in range(len(paths)) if results[i] is None]
+    tasks = [(action, str(paths[i]), str(output), extension) for i in pending]
+    with executor_for(executor, jobs) as executor:
+        if executor is None:
+            done = [_run(task) for task in tasks]
+        else:
+            done = list(executor.map(_run, tasks))
+    for i, result in zip(pending, done):
+        results[i] = result
+    seconds = time.perf_counter() - start
+
+    size = sum(result["bytes"] for result in results)
+    return {
+        "action": action,
+        "jobs": jobs,
+        "files": results,
+        "succeeded": sum(result["ok"] for result in results),
+        "failed": sum(not result["ok"] for result in results),
+        "bytes": size,
+        "seconds": seconds,
+        "files_per_second": len(results) / seconds if seconds else 0.0,
+        "mb_per_second": size / seconds / 1e6 if seconds else 0.0,
+    }
+
+
+def format_report(report):
+    lines = []
+    for result in report["files"]:
+        if result["ok"]:
+            lines.append("ok     {} ({:.2f}s)".format(result["input"], result["seconds"]))
+        else:
+            lines.append("FAILED {}: {}".format(result["input"], result["error"]))
+    lines.append("{} {} files, {} failed, in {:.2f}s ({:.2f} files/s, {:.2f} MB/s)".format(
+        report["action"], len(report["files"]), report["failed"], report["seconds"], report["files_per_second"],
+        report["mb_per_second"]))
+    return "\n".join(lines)
+
+
+def write_report(report, path):
+    pathlib.Path(path).write_text(json.dumps(report, indent=2))
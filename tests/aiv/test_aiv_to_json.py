@@ -1,5 +1,7 @@
 import os
 import pathlib
+import shutil
+import tempfile
 import unittest
 import logging
 from sourcehold.aivs.AIV import AIV
@@ -11,7 +13,8 @@ logger = logging.getLogger(__name__)
 
 # Используем переменную окружения для BASEPATH
 BASEPATH = pathlib.Path(os.getenv('BASEPATH', 'resources/aiv'))
-OUTPUT_DIR = pathlib.Path("output")
+# Результаты пишутся во временную директорию, если OUTPUT_DIR не задана
+OUTPUT_DIR = pathlib.Path(os.getenv('OUTPUT_DIR') or tempfile.mkdtemp(prefix="aivjson-"))
 
 class TestAIVConversion(unittest.TestCase):
     @classmethod
@@ -20,6 +23,11 @@ class TestAIVConversion(unittest.TestCase):
         OUTPUT_DIR.mkdir(exist_ok=True)
         logger.debug(f"Используется BASEPATH: {BASEPATH}")
 
+    @classmethod
+    def tearDownClass(cls) -> None:
+        if not os.getenv('OUTPUT_DIR'):
+            shutil.rmtree(OUTPUT_DIR, ignore_errors=True)
+
     def test_rat(self):
         if self.override:
             self.skipTest(f"Директория {BASEPATH} не существует, пропуск test_rat")
@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+
+from sourcehold import compression, load_map
+from sourcehold.compression.cache import CompressionCache, CachedCompressor
+from sourcehold.compression.DCL import DCL
+from sourcehold.structure_tools.Buffer import Buffer
+
+MAP_PATH = "resources/map/crusader/MxM_unseen_1.map"
+
+
+class CountingDCL(DCL):
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def compress(self, data, level=6):
+        self.calls += 1
+        return super().compress(data, level)
+
+
+class TestCompressionCache(unittest.TestCase):
+
+    def test_lru(self):
+        cache = CompressionCache(max_entries=2)
+        cache.put("a", b'1')
+        cache.put("b", b'2')
+        cache.get("a")
+        cache.put("c", b'3')
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("a"), b'1')
+        self.assertEqual(len(cache), 2)
+
+    def test_disk_store(self):
+        with tempfile.TemporaryDirectory() as path:
+            c1 = CachedCompressor(DCL(), CompressionCache(path=path))
+            compressed = c1.compress(b'AIAIAIAIAIAIA')
+            c2 = CachedCompressor(DCL(), CompressionCache(path=path))
+            self.assertEqual(c2.lookup(b'AIAIAIAIAIAIA'), compressed)
+            self.assertEqual(c2.lookup(b'AIAIAIAIAIAIA', 5), None)
+
+    def test_repack_only_compresses_changes(self):
+        base = CountingDCL()
+        compression.COMPRESSION = base
+        try:
+            compression.enable_cache()
+            m = load_map(MAP_PATH, force=True)
+            data = bytearray(m.directory[1045].get_data())
+            data[0] ^= 1
+            m.directory[1045].set_data(bytes(data))
+            m.pack(True)
+            self.assertEqual(base.calls, 1)
+            m.serialize_to_buffer(Buffer())
+        finally:
+            compression.COMPRESSION = DCL()
@@ -1,5 +1,7 @@
+import io
 import unittest
 
+from sourcehold import compression
 from sourcehold.compression import DCL
 
 datac = b'\x00\x04\x82$%\x8f\x80\x7f'
@@ -25,11 +27,44 @@ class TestCompressors(unittest.TestCase):
     def test_direct_compress(self):
         self.assertEqual(c1.compress(datad, level=6), datac2)
 
-    # def test_direct_compress_level_4(self):
-    #     self.assertEqual(c1.compress(datad, level=4), datac)
+    def test_direct_compress_level_4(self):
+        self.assertEqual(c1.compress(datad, level=4), datac)
+
+    def test_modes_and_dictionary_sizes(self):
+        for name in ("dcl-binary", "dcl-ascii"):
+            c = compression.get_compressor(name)
+            for level in (4, 5, 6):
+                data = c.compress(datad * 100, level)
+                self.assertEqual(c.parameters_of(data), c.parameters(level))
+                self.assertEqual(c1.decompress(data), datad * 100)
+        self.assertRaises(NotImplementedError, c1.compress, datad, 7)
 
     # def test_blast_compress(self):
     #     self.assertEqual(c2.compress(datad), datac2)
     #
     # def test_subprocess_compress(self):
     #     self.assertEqual(c3.compress(datad, level=6), datac2)
+
+
+class TestStreaming(unittest.TestCase):
+
+    def test_chunked_matches_one_shot(self):
+        data = datad * 5000
+        chunks = [data[i:i + 1000] for i in range(0, len(data), 1000)]
+        compressed = b''.join(c1.iter_compress(chunks))
+        self.assertEqual(compressed, c1.compress(data))
+
+        parts = [compressed[i:i + 7] for i in range(0, len(compressed), 7)]
+        self.assertEqual(b''.join(c1.iter_decompress(parts)), data)
+
+    def test_file_adapters(self):
+        data = datad * 5000
+        out = io.BytesIO()
+        with c1.writer(out) as w:
+            w.write(memoryview(data)[:100])
+            w.write(bytearray(data[100:]))
+        self.assertEqual(out.getvalue(), c1.compress(data))
+
+        r = c1.reader(io.BytesIO(out.getvalue()))
+        self.assertEqual(r.read(5), data[:5])
+        self.assertEqual(r.read(), data[5:])
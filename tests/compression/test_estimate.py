@@ -0,0 +1,29 @@
+import os
+import unittest
+
+from sourcehold import load_map
+from sourcehold.compression import COMPRESSION
+from sourcehold.compression.estimate import estimate_compressed_size
+
+SAV_PATH = "resources/sav/crusader/example.sav"
+
+
+class TestEstimate(unittest.TestCase):
+
+    def test_bounds(self):
+        self.assertLess(estimate_compressed_size(b'\x00' * 100000), 2000)
+        noise = os.urandom(100000)
+        self.assertGreater(estimate_compressed_size(noise), 100000)
+        self.assertLessEqual(estimate_compressed_size(noise), 100000 * 9 // 8 + 4)
+
+    def test_sections(self):
+        m = load_map(SAV_PATH)
+        actual = 0
+        estimated = 0
+        for index in (1001, 1013, 1015, 1022, 1045):
+            section = m.directory[index]
+            self.assertEqual(section.estimate_compressed_size(), section.compressed_size)
+            section.set_data(section.get_data())
+            actual += len(COMPRESSION.compress(section.get_data()))
+            estimated += section.estimate_compressed_size()
+        self.assertLess(abs(estimated - actual) / actual, 0.5)
@@ -0,0 +1,34 @@
+import unittest
+
+from sourcehold import load_map
+from sourcehold.compression.benchmark import benchmark
+from sourcehold.maps.sections.section1045 import Section1045
+
+MAP_PATH = "resources/map/crusader/MxM_unseen_1.map"
+
+
+class TestSectionCompressors(unittest.TestCase):
+
+    def test_section_type_selects_compressor(self):
+        m = load_map(MAP_PATH)
+        section = m.directory[1045]
+        data = section.get_data()
+        try:
+            Section1045._COMPRESSOR_ = "dcl-ascii"
+            Section1045._COMPRESSION_LEVEL_ = 5
+            fresh = Section1045()
+            fresh.set_data(data)
+            fresh.pack()
+            self.assertEqual(bytes(fresh.data[:2]), b'\x01\x05')
+        finally:
+            del Section1045._COMPRESSOR_
+            del Section1045._COMPRESSION_LEVEL_
+
+        fresh.unpack(True)
+        self.assertEqual(fresh.get_data(), data)
+
+    def test_benchmark(self):
+        results = benchmark([MAP_PATH], [("dcl-binary", 6)])
+        count, size, compressed, seconds = results[(1045, "dcl-binary", 6)]
+        self.assertEqual(count, 1)
+        self.assertEqual(size, len(load_map(MAP_PATH).directory[1045].get_data()))
@@ -0,0 +1,63 @@
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from sourcehold import scan_map_metadata
+from sourcehold.maps.library import Library
+
+MAP_PATH = "resources/map/crusader/MxM_unseen_1_desc_2.map"
+SAV_PATH = "resources/sav/crusader/example.sav"
+
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = pathlib.Path(tempfile.mkdtemp())
+        (self.folder / "Maps").mkdir()
+        (self.folder / "Saves").mkdir()
+        shutil.copyfile(MAP_PATH, str(self.folder / "Maps" / "a.map"))
+        shutil.copyfile(MAP_PATH, str(self.folder / "Maps" / "b.map"))
+        shutil.copyfile(SAV_PATH, str(self.folder / "Saves" / "example.sav"))
+        self.library = Library(self.folder)
+        self.catalog = self.library.catalog(self.folder / "catalog.sqlite")
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(str(self.folder))
+
+    def test_incremental_refresh(self):
+        self.assertEqual(self.catalog.refresh(), (3, 0, 0))
+        self.assertEqual(self.catalog.refresh(), (0, 0, 3))
+
+        (self.folder / "Maps" / "b.map").unlink()
+        (self.folder / "Maps" / "broken.map").write_bytes(b'\x00' * 16)
+        path = self.folder / "Saves" / "example.sav"
+        stat = path.stat()
+        os.utime(str(path), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.catalog.refresh(), (2, 1, 1))
+        self.assertEqual(list(self.catalog.errors()), [str(self.folder / "Maps" / "broken.map")])
+        self.assertEqual(len(self.catalog), 3)
+
+        with self.library.catalog(self.catalog.path) as reopened:
+            self.assertEqual(reopened.refresh(), (0, 0, 3))
+
+    def test_queries(self):
+        self.catalog.refresh()
+        sav = str(self.folder / "Saves" / "example.sav")
+        maps = [str(self.folder / "Maps" / "a.map"), str(self.folder / "Maps" / "b.map")]
+        metadata = scan_map_metadata(SAV_PATH)
+        crc = metadata.section_hashes()[1045]
+
+        self.assertEqual(self.catalog.query(kind="map"), maps)
+        self.assertEqual(self.catalog.query(section=1045, crc32=crc), [sav])
+        self.assertEqual(self.catalog.query(locked=False, section=1045, crc32=crc),
+                         [sav] if metadata.map_locked == 0 else [])
+        self.assertEqual(self.catalog.query(description="Hello universe"), maps)
+        self.assertEqual(self.catalog.section_hashes(sav), metadata.section_hashes())
+
+        row = self.catalog.get(sav)
+        self.assertEqual(row["game_mode"], metadata.game_mode)
+        self.assertEqual(row["size"], os.path.getsize(SAV_PATH))
+        self.assertEqual(self.catalog.get_thumbnail(sav).size, (64, 64))
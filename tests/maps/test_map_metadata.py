@@ -0,0 +1,40 @@
+import binascii
+import unittest
+from unittest import mock
+
+from sourcehold import iotools, load_map, scan_map_metadata
+
+MAP_PATHS = ["resources/map/crusader/MxM_unseen_1_desc_2.map", "resources/sav/crusader/example.sav"]
+
+
+class TestMapMetadata(unittest.TestCase):
+
+    def test_matches_load_map(self):
+        for path in MAP_PATHS:
+            metadata = scan_map_metadata(path)
+            m = load_map(path, force=True)
+            self.assertEqual(metadata.magic, m.magic)
+            self.assertEqual(metadata.get_description(), m.description.get_description())
+            self.assertEqual(metadata.preview.get_data(), m.preview.get_data())
+            self.assertEqual(metadata.game_mode, m.u3.int1)
+            self.assertEqual(metadata.map_locked, m.u3.map_locked)
+            self.assertEqual(metadata.u4.get_data(), m.u4.get_data())
+            self.assertEqual(metadata.directory_u1, list(m.directory.directory_u1))
+            self.assertEqual(metadata.version, m.directory._MAX_SECTIONS_COUNT())
+            self.assertEqual(metadata.sections_count, m.directory.sections_count)
+            self.assertEqual(metadata.section_offsets, list(m.directory.section_offsets[:m.directory.sections_count]))
+            hashes = metadata.section_hashes()
+            for index in m.directory.indices():
+                self.assertEqual(hashes[index], binascii.crc32(m.directory[index].get_data()))
+
+    def test_reads_only_the_header(self):
+        reads = []
+
+        def read_at(f, offset, size):
+            reads.append(size)
+            return iotools.read_at(f, offset, size)
+
+        with mock.patch("sourcehold.maps.MapMetadata.read_at", read_at):
+            metadata = scan_map_metadata(MAP_PATHS[1])
+        self.assertLessEqual(len(reads), 5)
+        self.assertLess(sum(reads), metadata.preview_size + 16384)
@@ -0,0 +1,55 @@
+import json
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from sourcehold import load_map
+from sourcehold.tool.batch import run_batch, write_report
+
+MAP_PATH = "resources/map/crusader/xlcr.map"
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = pathlib.Path(tempfile.mkdtemp())
+        shutil.copyfile(MAP_PATH, str(self.folder / "xlcr.map"))
+        (self.folder / "broken.map").write_bytes(b'\x00' * 5)
+
+    def tearDown(self):
+        shutil.rmtree(str(self.folder))
+
+    def test_failures_are_isolated(self):
+        paths = [self.folder / "broken.map", self.folder / "xlcr.map"]
+        report = run_batch("unpack", paths, self.folder / "out", jobs=2)
+
+        self.assertEqual([f["input"] for f in report["files"]], [str(p) for p in paths])
+        self.assertEqual([f["ok"] for f in report["files"]], [False, True])
+        self.assertIn("UnderflowException", report["files"][0]["error"])
+        self.assertEqual((report["succeeded"], report["failed"]), (1, 1))
+        self.assertEqual(report["bytes"], (self.folder / "xlcr.map").stat().st_size)
+        self.assertFalse((self.folder / "out" / "broken").exists())
+
+        write_report(report, self.folder / "report.json")
+        self.assertEqual(json.loads((self.folder / "report.json").read_text())["failed"], 1)
+
+        report = run_batch("pack", [self.folder / "out" / "xlcr"], self.folder / "packed", extension=".sav")
+        self.assertIn("not .sav", report["files"][0]["error"])
+
+        report = run_batch("pack", [self.folder / "out" / "xlcr"], self.folder / "packed")
+        self.assertEqual(report["failed"], 0)
+        packed = load_map(str(self.folder / "packed" / "xlcr.map"), force=True)
+        original = load_map(MAP_PATH, force=True)
+        self.assertEqual(list(packed.directory.different_sections(original.directory)), [])
+
+    def test_shared_destinations_fail(self):
+        shutil.copyfile(MAP_PATH, str(self.folder / "xlcr.sav"))
+        paths = [self.folder / "xlcr.map", self.folder / "broken.map", self.folder / "xlcr.sav"]
+        report = run_batch("unpack", paths, self.folder / "out", jobs=2)
+
+        self.assertEqual([f["ok"] for f in report["files"]], [False, False, False])
+        self.assertIn("same destination as {}".format(paths[2]), report["files"][0]["error"])
+        self.assertIn("same destination as {}".format(paths[0]), report["files"][2]["error"])
+        self.assertIn("UnderflowException", report["files"][1]["error"])
+        self.assertFalse((self.folder / "out" / "xlcr").exists())
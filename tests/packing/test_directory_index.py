@@ -0,0 +1,48 @@
+import unittest
+
+from sourcehold import load_map
+from sourcehold.aivs.AIV import AIV
+
+SAV_PATH = "resources/sav/crusader/example.sav"
+
+
+class TestDirectoryIndex(unittest.TestCase):
+
+    def test_lookups(self):
+        m = load_map(SAV_PATH)
+        d = m.directory
+        for i, index in enumerate(d.indices()):
+            self.assertIs(d[index], d.sections[i])
+        self.assertIs(d["POPULARITY"], d[1061])
+        self.assertRaises(KeyError, d.__getitem__, 9999)
+        self.assertRaises(KeyError, d.__getitem__, "UNKNOWN")
+
+    def test_mutation(self):
+        d = load_map(SAV_PATH).directory
+        section = d[1061]
+        d["POPULARITY"] = d[1045]
+        self.assertIs(d[1061], d[1045])
+        d[1061] = section
+        self.assertIs(d["POPULARITY"], section)
+
+        # Direct modifications are picked up as well
+        i = d.section_indices.index(1045)
+        d.section_indices[i] = 9999
+        self.assertRaises(KeyError, d.__getitem__, 1045)
+        self.assertIs(d[9999], d.sections[i])
+
+    def test_lazy_key_lookup(self):
+        d = load_map(SAV_PATH, lazy=True).directory
+        d["POPULARITY"]
+        self.assertEqual(sum(s.is_loaded() for s in d.sections), 0)
+        self.assertEqual(d["POPULARITY"].KEY, "POPULARITY")
+        self.assertIn("POPULARITY", d.keys())
+
+
+class TestAIVDirectoryIndex(unittest.TestCase):
+
+    def test_lookups(self):
+        aiv = AIV().from_file("resources/aiv/Abbot1.aiv")
+        d = aiv.directory
+        for i, index in enumerate(d.indices()):
+            self.assertIs(d[index], d.sections[i])
@@ -0,0 +1,59 @@
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from sourcehold import load_map, save_map
+from sourcehold.iotools import patch_file
+from sourcehold.structure_tools.Buffer import Buffer
+
+SAV_PATH = "resources/sav/crusader/example.sav"
+
+
+class TestIncrementalSave(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, "example.sav")
+        shutil.copyfile(SAV_PATH, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_patch_file(self):
+        data = bytearray(pathlib.Path(self.path).read_bytes())
+        data[5000] ^= 1
+        data[len(data) - 1] ^= 1
+        self.assertEqual(patch_file(self.path, data), 2)
+        self.assertEqual(pathlib.Path(self.path).read_bytes(), data)
+        self.assertIsNone(patch_file(self.path, data + b'\x00'))
+        self.assertIsNone(patch_file(os.path.join(self.folder, "missing.sav"), data))
+
+    def test_same_size_edit_is_patched(self):
+        m = load_map(self.path, unpack=False)
+        m.directory[1073].stables = not m.directory[1073].stables
+        expected = Buffer()
+        inode = os.stat(self.path).st_ino
+        with mock.patch("sourcehold.iotools.write_atomic") as write_atomic:
+            save_map(m, self.path, incremental=True)
+        m.serialize_to_buffer(expected)
+
+        write_atomic.assert_not_called()
+        self.assertEqual(os.stat(self.path).st_ino, inode)
+        self.assertEqual(pathlib.Path(self.path).read_bytes(), expected.getvalue())
+        self.assertNotEqual(pathlib.Path(self.path).read_bytes(), pathlib.Path(SAV_PATH).read_bytes())
+
+    def test_compressed_edit(self):
+        m = load_map(self.path, lazy=True, unpack=False)
+        data = bytearray(m.directory[1045].get_data())
+        data[0] ^= 1
+        m.directory[1045].set_data(bytes(data))
+        save_map(m, self.path, incremental=True)
+
+        reloaded = load_map(self.path)
+        self.assertEqual(reloaded.directory[1045].get_data(), bytes(data))
+        original = load_map(SAV_PATH)
+        self.assertEqual(list(reloaded.directory.different_sections(original.directory)), [1045])
+        self.assertEqual(os.listdir(self.folder), ["example.sav"])
@@ -0,0 +1,68 @@
+import pathlib
+import unittest
+
+from sourcehold import load_map
+from sourcehold.maps.Map import Map
+from sourcehold.maps.SectionProxy import SectionProxy
+from sourcehold.structure_tools.Buffer import Buffer
+
+SAV_PATH = "resources/sav/crusader/example.sav"
+
+
+class TestLazyLoading(unittest.TestCase):
+
+    def test_sections_are_loaded_on_demand(self):
+        m = load_map(SAV_PATH, lazy=True)
+        self.assertTrue(all(isinstance(s, SectionProxy) for s in m.directory.sections))
+        self.assertFalse(any(s.is_loaded() for s in m.directory.sections))
+
+        eager = load_map(SAV_PATH)
+        self.assertEqual(m.directory[1045].get_data(), eager.directory[1045].get_data())
+        self.assertEqual(sum(s.is_loaded() for s in m.directory.sections), 1)
+
+    def test_round_trip(self):
+        raw = pathlib.Path(SAV_PATH).read_bytes()
+        m = load_map(SAV_PATH, lazy=True)
+        m.directory[1045].get_data()
+        m.directory[1073].stone_keep
+
+        buf = Buffer()
+        m.serialize_to_buffer(buf)
+        self.assertEqual(buf.getvalue(), raw)
+
+    def test_modified_section(self):
+        m = load_map(SAV_PATH, lazy=True)
+        data = bytearray(m.directory[1045].get_data())
+        data[0] = (data[0] + 1) % 256
+        m.directory[1045].set_data(bytes(data))
+        m.pack()
+
+        buf = Buffer()
+        m.serialize_to_buffer(buf)
+        buf.seek(0)
+
+        m2 = Map().from_buffer(buf)
+        self.assertEqual(m2.directory[1045].get_data(), bytes(data))
+        self.assertEqual(m2.directory[1001].get_data(), m.directory[1001].get_data())
+
+    def test_selected_sections(self):
+        raw = pathlib.Path(SAV_PATH).read_bytes()
+        m = load_map(SAV_PATH, force=True, sections=[1045, 1005, "preview"])
+        loaded = [m.directory.section_indices[i] for i in range(len(m.directory.sections))
+                  if m.directory.sections[i].is_loaded()]
+        self.assertEqual(sorted(loaded), [1005, 1045])
+        self.assertTrue(hasattr(m.preview, "uncompressed"))
+        self.assertTrue(hasattr(m.directory[1045], "uncompressed"))
+        self.assertFalse(hasattr(m.description, "uncompressed"))
+
+        eager = load_map(SAV_PATH)
+        self.assertEqual(m.directory[1045].get_data(), eager.directory[1045].get_data())
+
+        buf = Buffer()
+        m.serialize_to_buffer(buf)
+        self.assertEqual(buf.getvalue(), raw)
+
+    def test_map_from_file_sections(self):
+        m = Map().from_file(SAV_PATH, sections=[1005])
+        self.assertEqual(sum(s.is_loaded() for s in m.directory.sections), 1)
+        self.assertRaises(KeyError, m.load_sections, [9999])
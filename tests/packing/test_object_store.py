@@ -0,0 +1,53 @@
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from sourcehold import load_map
+from sourcehold.maps.Map import Map
+from sourcehold.maps.ObjectStore import ObjectStore
+from sourcehold.structure_tools.Buffer import Buffer
+
+MAP_PATH = "resources/map/crusader/xlcr.map"
+
+
+class TestObjectStore(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = pathlib.Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(str(self.folder))
+
+    def test_put_and_get(self):
+        store = ObjectStore(self.folder / "store", compress=True)
+        key = store.put(b'\x00' * 1000)
+        self.assertEqual(store.put(b'\x00' * 1000), key)
+        self.assertEqual(store.written, 1)
+        self.assertEqual(ObjectStore(self.folder / "store").get(key), b'\x00' * 1000)
+        self.assertLess(sum(f.stat().st_size for f in (self.folder / "store").rglob("*.z")), 100)
+        self.assertRaises(KeyError, store.get, ObjectStore.key(b'missing'))
+
+    def test_dump_and_load_from_manifest(self):
+        m = load_map(MAP_PATH, force=True)
+        store = ObjectStore(self.folder / "store")
+        m.dump_to_folder(str(self.folder / "a"), store)
+        written = store.written
+        m.dump_to_folder(str(self.folder / "b"), store)
+        self.assertEqual(store.written, written)
+        self.assertEqual([p.name for p in (self.folder / "b").iterdir()], ["manifest.json"])
+
+        # Identical payloads, e.g. empty tile layers, are stored once
+        m.dump_to_folder(str(self.folder / "files"))
+        files = [p for p in (self.folder / "files").rglob("*") if p.is_file()]
+        self.assertLess(len(store), len(files))
+
+        shutil.move(str(self.folder), str(self.folder) + ".moved")
+        self.folder = pathlib.Path(str(self.folder) + ".moved")
+        m2 = Map().load_from_folder(str(self.folder / "b"))
+        m3 = Map().load_from_folder(str(self.folder / "files"))
+        self.assertEqual(list(m2.directory.different_sections(m3.directory)), [])
+        self.assertEqual(m2.description.get_data(), m.description.get_data())
+        self.assertEqual(bytes(m2.u3.get_data()), bytes(m.u3.get_data()))
+        m2.pack(True)
+        m2.serialize_to_buffer(Buffer())
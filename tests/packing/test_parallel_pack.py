@@ -0,0 +1,73 @@
+import unittest
+
+from sourcehold import load_map
+from sourcehold.compression.parallel import create_executor
+from sourcehold.structure_tools.Buffer import Buffer
+
+MAP_PATH = "resources/map/crusader/MxM_unseen_1.map"
+
+
+def packed_bytes(executor=None):
+    m = load_map(MAP_PATH)
+    m.unpack(True)
+    m.pack(True, executor)
+    buf = Buffer()
+    m.serialize_to_buffer(buf)
+    return buf.getvalue()
+
+
+class TestParallelPack(unittest.TestCase):
+
+    def test_identical_output(self):
+        serial = packed_bytes()
+        for kind in ("thread", "process"):
+            with create_executor(2, kind) as executor:
+                self.assertEqual(packed_bytes(executor), serial)
+
+    def test_only_dirty_sections(self):
+        m = load_map(MAP_PATH)
+        data = bytearray(m.directory[1045].get_data())
+        data[0] ^= 1
+        m.directory[1045].set_data(bytes(data))
+        with create_executor(2, "thread") as executor:
+            m.pack(False, executor)
+        self.assertFalse(m.directory[1045]._dirty)
+        self.assertEqual(m.directory[1045].uncompressed_size, len(data))
+        self.assertEqual(m.directory.section_lengths[m.directory.section_indices.index(1045)],
+                         m.directory[1045].size_of())
+
+
+class TestParallelUnpack(unittest.TestCase):
+
+    def test_identical_sections(self):
+        serial = load_map(MAP_PATH, force=True)
+        with create_executor(2, "thread") as executor:
+            parallel = load_map(MAP_PATH, force=True, executor=executor)
+        self.assertEqual(parallel.description.uncompressed, serial.description.uncompressed)
+        for index in serial.directory.indices():
+            self.assertEqual(parallel.directory[index].get_data(), serial.directory[index].get_data())
+
+    def test_error_names_section(self):
+        m = load_map(MAP_PATH, unpack=False)
+        m.directory[1045].hash ^= 1
+        with self.assertRaisesRegex(Exception, "section 1045: crc32 mismatch"):
+            m.unpack(True, workers=2)
+
+    def test_unpack_without_force(self):
+        with create_executor(2, "thread") as executor:
+            m = load_map(MAP_PATH, executor=executor)
+        indices, sections = m.directory.compressed_sections()
+        self.assertTrue(all(hasattr(section, "uncompressed") for section in sections))
+        self.assertTrue(hasattr(m.preview, "uncompressed"))
+
+    def test_unpack_keeps_edits(self):
+        for workers in (None, 2):
+            m = load_map(MAP_PATH)
+            m.description.set_description("hello world")
+            data = bytearray(m.directory[1045].get_data())
+            data[0] ^= 1
+            m.directory[1045].set_data(bytes(data))
+
+            m.unpack(workers=workers)
+            self.assertEqual(m.description.get_description().split("\x00")[0], "hello world")
+            self.assertEqual(m.directory[1045].get_data(), bytes(data))
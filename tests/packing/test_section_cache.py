@@ -0,0 +1,40 @@
+import pathlib
+import unittest
+
+from sourcehold import load_map
+from sourcehold.maps.SectionCache import SectionCache
+from sourcehold.structure_tools.Buffer import Buffer
+
+SAV_PATH = "resources/sav/crusader/example.sav"
+
+
+class TestSectionCache(unittest.TestCase):
+
+    def test_budget(self):
+        eager = load_map(SAV_PATH, force=True)
+        cache = SectionCache(max_bytes=4 * 1024 * 1024)
+        m = load_map(SAV_PATH, force=True, section_cache=cache)
+
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+        self.assertGreater(cache.evictions, 0)
+        for index in eager.directory.indices():
+            self.assertEqual(m.directory[index].get_data(), eager.directory[index].get_data())
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+
+        buf = Buffer()
+        m.serialize_to_buffer(buf)
+        self.assertEqual(buf.getvalue(), pathlib.Path(SAV_PATH).read_bytes())
+
+    def test_dirty_sections_stay_resident(self):
+        cache = SectionCache(max_bytes=0)
+        m = load_map(SAV_PATH, unpack=False, section_cache=cache)
+        data = bytearray(m.directory[1045].get_data())
+        data[0] ^= 1
+        m.directory[1045].set_data(bytes(data))
+        for index in (1013, 1015, 1022):
+            m.directory[index].get_data()
+        self.assertEqual(m.directory[1045].uncompressed, bytes(data))
+        self.assertFalse(hasattr(m.directory[1013], "uncompressed"))
+
+        m.pack()
+        self.assertEqual(m.directory[1045].get_data(), bytes(data))
@@ -0,0 +1,75 @@
+import unittest
+
+from sourcehold import load_map
+from sourcehold.compression.parallel import create_executor
+from sourcehold.maps.Map import Map
+from sourcehold.structure_tools.Buffer import Buffer
+
+SAV_PATH = "resources/sav/crusader/example.sav"
+
+
+def corrupted_map(verify):
+    m = load_map(SAV_PATH, unpack=False)
+    m.directory[1045].hash ^= 1
+    buf = Buffer()
+    m.serialize_to_buffer(buf)
+    return Map().from_buffer(Buffer(buf.getvalue()), verify=verify)
+
+
+class TestVerification(unittest.TestCase):
+
+    def test_eager(self):
+        m = corrupted_map("eager")
+        self.assertRaisesRegex(Exception, "crc32 mismatch", m.directory[1045].get_data)
+
+    def test_lazy(self):
+        m = corrupted_map("lazy")
+        m.unpack()
+        m.directory[1045].get_data()
+        m.directory[1013].get_data()
+
+        report = m.verify()
+        self.assertEqual(list(report.failed), [1045])
+        self.assertIn(1013, report.passed)
+        self.assertFalse(report.ok)
+        self.assertRaisesRegex(Exception, "1045", report.raise_for_errors)
+
+        # Verified sections are not checked again
+        self.assertEqual(list(m.verify().failed), [1045])
+        self.assertIn(1013, m.verify().skipped)
+
+    def test_undecompressable_payload(self):
+        m = load_map(SAV_PATH, verify="lazy")
+        data = bytearray(m.directory[1045].data)
+        data[2] ^= 0xFF
+        data[3] ^= 0xFF
+        m.directory[1045].data = bytes(data)
+
+        report = m.verify()
+        self.assertEqual(list(report.failed), [1045])
+        self.assertIn(1013, report.passed)
+
+    def test_off_untouched(self):
+        for force in (False, True):
+            m = load_map(SAV_PATH, verify="off", force=force)
+            report = m.verify()
+            self.assertTrue(report.ok)
+            self.assertEqual(report.passed, [])
+            self.assertEqual(len(report.skipped), len(m.directory.compressed_sections()[0]) + 2)
+        m = corrupted_map("off")
+        self.assertTrue(m.verify().ok)
+        self.assertFalse(hasattr(m.directory[1045], "uncompressed"))
+        self.assertEqual(list(m.verify(force=True).failed), [1045])
+
+    def test_off(self):
+        m = corrupted_map("off")
+        m.directory[1045].get_data()
+        self.assertTrue(m.verify().ok)
+        self.assertEqual(list(m.verify(force=True).failed), [1045])
+
+    def test_parallel_lazy_load(self):
+        m = load_map(SAV_PATH, lazy=True, verify="lazy")
+        with create_executor(2, "thread") as executor:
+            report = m.verify(executor=executor)
+        self.assertTrue(report.ok)
+        self.assertEqual(len(report.passed), len(m.directory.compressed_sections()[0]) + 2)
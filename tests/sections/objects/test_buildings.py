@@ -1,4 +1,8 @@
 import unittest
+
+from sourcehold import load_map
+from sourcehold.structure_tools import Buffer
+from sourcehold.maps.Map import Map
 # import pathlib
 
 # from sourcehold import *
@@ -7,7 +11,40 @@ import unittest
 
 
 class TestBuildings(unittest.TestCase):
-  pass
+
+    def test_data_property_write_through(self):
+        m = load_map("resources/sav/crusader/example.sav")
+        section = m.directory[1013]
+        building = section[1]
+        building.owner = 7
+        building.locations = list(range(36))
+        self.assertEqual(building.owner, 7)
+        self.assertEqual(building.locations, list(range(36)))
+
+        m.pack()
+        buf = Buffer()
+        m.serialize_to_buffer(buf)
+        buf.seek(0)
+
+        m2 = Map().from_buffer(buf)
+        self.assertEqual(m2.directory[1013][1].owner, 7)
+        self.assertEqual(m2.directory[1013][1].locations, list(range(36)))
+
+    def test_write_after_pack(self):
+        m = load_map("resources/sav/crusader/example.sav")
+        building = m.directory[1013][1]
+        building.owner = 7
+        m.pack()
+        building.owner = 5
+        m.pack()
+
+        buf = Buffer()
+        m.serialize_to_buffer(buf)
+        buf.seek(0)
+
+        m2 = Map().from_buffer(buf)
+        self.assertEqual(m2.directory[1013][1].owner, 5)
+
     # def test_persistence(self):
     #     map_file = str(pathlib.Path("resources/map/crusader/MxM_unseen_1.map"))
     #     with open(map_file, 'rb') as f:
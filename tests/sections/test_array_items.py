@@ -0,0 +1,37 @@
+import unittest
+
+import numpy
+
+from sourcehold import load_map
+
+
+class TestArrayItems(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.map = load_map("resources/sav/crusader/example.sav")
+
+    def test_items_are_created_on_access(self):
+        section = self.map.directory[1015]
+        self.assertEqual(len(section), 2500)
+        self.assertEqual(len(section.items._items), 0)
+        self.assertIs(section[10], section[10])
+        self.assertEqual(len(section.items._items), 1)
+        self.assertRaises(KeyError, section.__getitem__, 2500)
+
+    def test_occupied_skips_empty_items(self):
+        section = self.map.directory[1013]
+        occupied = dict(section.items.occupied())
+        self.assertGreater(len(occupied), 0)
+        self.assertLess(len(occupied), len(section))
+        for i in range(len(section)):
+            empty = set(section.get_data()[i * 812:(i + 1) * 812]) == {0}
+            self.assertEqual(i in occupied, not empty)
+
+    def test_numpy_indices(self):
+        section = self.map.directory[1013]
+        for i in numpy.flatnonzero(section.records["owner"] != 0)[:3]:
+            self.assertIs(section[i], section[int(i)])
+        self.assertIn(numpy.int64(1), section.items)
+        self.assertNotIn("1", section.items)
+        self.assertRaises(KeyError, section.__getitem__, "1")
@@ -0,0 +1,57 @@
+import binascii
+import unittest
+
+import numpy
+
+from sourcehold import load_map
+from sourcehold.maps.Map import Map
+from sourcehold.maps.sections.objects import Building
+from sourcehold.structure_tools.Buffer import Buffer
+
+
+class TestRecords(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.map = load_map("resources/sav/crusader/example.sav")
+
+    def test_columns_match_data_properties(self):
+        section = self.map.directory[1015]
+        records = section.get_records()
+        self.assertEqual(len(records), section._LENGTH_)
+        for i in (0, 1, 100):
+            self.assertEqual(records["owner"][i], section[i].owner)
+            self.assertEqual(records["unit_type"][i], section[i].unit_type)
+        self.assertRaises(ValueError, records["owner"].__setitem__, 0, 1)
+
+    def test_array_columns(self):
+        records = self.map.directory[1013].get_records()
+        self.assertEqual(records.dtype.itemsize, Building.size_of())
+        self.assertEqual(list(records["locations"][2]), self.map.directory[1013][2].locations)
+
+    def test_writes_go_to_section_data(self):
+        section = self.map.directory[1013]
+        records = section.get_records(writable=True)
+        records["owner"][numpy.arange(3)] = 5
+        self.assertEqual([section[i].owner for i in range(3)], [5, 5, 5])
+        self.assertTrue(section._dirty)
+
+    def test_records_are_read_only(self):
+        m = load_map("resources/sav/crusader/example.sav")
+        section = m.directory[1015]
+        self.assertEqual(section.records["owner"][0], section[0].owner)
+        self.assertFalse(section._dirty)
+        self.assertRaises(ValueError, section.records["owner"].__setitem__, 0, 1)
+
+    def test_view_kept_across_pack(self):
+        m = load_map("resources/sav/crusader/example.sav")
+        records = m.directory[1015].get_records(writable=True)
+        records["owner"][0] = 3
+        m.pack()
+        records["owner"][0] = 4
+        m.pack()
+        self.assertEqual(binascii.crc32(m.directory[1015].get_data()), m.directory[1015].hash)
+
+        buf = Buffer()
+        m.serialize_to_buffer(buf)
+        self.assertEqual(Map().from_buffer(Buffer(buf.getvalue())).directory[1015][0].owner, 4)
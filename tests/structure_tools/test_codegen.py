@@ -0,0 +1,37 @@
+import pathlib
+import unittest
+
+from sourcehold.aivs.AIVDirectory import AIVDirectory
+from sourcehold.maps.CompressedSection import CompressedSection
+from sourcehold.maps.Description import Description
+from sourcehold.maps.Directory import Directory
+from sourcehold.maps.Map import Map
+from sourcehold.maps.SimpleSection import SimpleSection
+from sourcehold.structure_tools.Buffer import Buffer
+from sourcehold.structure_tools.codegen import enable_generated_codecs, disable_generated_codecs
+
+CLASSES = (Map, Directory, AIVDirectory, Description, CompressedSection, SimpleSection)
+
+
+class TestGeneratedCodecs(unittest.TestCase):
+
+    def setUp(self) -> None:
+        enable_generated_codecs(*CLASSES)
+
+    def tearDown(self) -> None:
+        disable_generated_codecs(*CLASSES)
+
+    def test_subclasses_use_generated_codec(self):
+        from sourcehold.maps.sections import Section1045
+        self.assertIsNotNone(Section1045.get_plan().generated)
+        self.assertIs(Section1045.get_plan().generated, CompressedSection.get_plan().generated)
+
+    def test_round_trip(self):
+        for path in ["resources/map/crusader/MxM_unseen_1.map", "resources/sav/crusader/example.sav"]:
+            raw = pathlib.Path(path).read_bytes()
+            m = Map().from_buffer(Buffer(raw))
+            self.assertEqual(m.directory[1045].get_data(), Map().from_buffer(Buffer(raw)).directory[1045].get_data())
+
+            buf = Buffer()
+            m.serialize_to_buffer(buf)
+            self.assertEqual(buf.getvalue(), raw)
@@ -0,0 +1,36 @@
+import unittest
+
+from sourcehold import load_map
+from sourcehold.structure_tools.diff import diff_data, diff_sections, checksums_equal
+
+SAV_PATH = "resources/sav/crusader/example.sav"
+
+
+class TestDiff(unittest.TestCase):
+
+    def test_diff_data(self):
+        d = diff_data(b'\x00\x01\x02\x03\x04\x05', b'\x00\x09\x09\x03\x04\x09\x09')
+        self.assertEqual(d.count, 3)
+        self.assertEqual(d.ranges, [(1, 3), (5, 6)])
+        self.assertTrue(d)
+
+        d = diff_data(b'\x00\x01\x02\x03', b'\x00\x01\x02\x04', "H")
+        self.assertEqual((d.n, d.count, d.ranges), (2, 1, [(1, 2)]))
+        self.assertEqual(d.byte_ranges(), [(2, 4)])
+
+        self.assertFalse(diff_data(bytearray(b'abc'), memoryview(b'abc')))
+
+    def test_diff_sections(self):
+        a = load_map(SAV_PATH)
+        b = load_map(SAV_PATH)
+        self.assertTrue(checksums_equal(a.directory[1045], b.directory[1045]))
+        self.assertIsNone(diff_sections(a.directory[1045], b.directory[1045]))
+        self.assertEqual(list(a.directory.yield_inequalities(b.directory)), [])
+
+        data = bytearray(b.directory[1045].get_data())
+        data[4] ^= 0xff
+        b.directory[1045].set_data(bytes(data))
+        self.assertIsNone(checksums_equal(a.directory[1045], b.directory[1045]))
+        d = diff_sections(a.directory[1045], b.directory[1045])
+        self.assertEqual(d.count, 1)
+        self.assertEqual(list(a.directory.different_sections(b.directory)), [1045])
@@ -0,0 +1,109 @@
+import contextlib
+import io
+import logging
+import pathlib
+import threading
+import unittest
+
+from sourcehold.maps.Map import Map
+from sourcehold.maps.Description import Description
+from sourcehold.structure_tools.Buffer import Buffer
+from sourcehold.structure_tools.Field import Field
+from sourcehold.structure_tools.FieldPlan import FieldPlan
+from sourcehold.structure_tools.Structure import Structure
+
+
+class Header(Structure):
+    a = Field("a", "I")
+    b = Field("b", "H")
+    c = Field("c", "I", 3)
+    d = Field("d", "B", 2)
+    size = Field("size", "I")
+    data = Field("data", "B", size)
+
+
+class TestFieldPlan(unittest.TestCase):
+
+    def test_contiguous_primitives_are_merged(self):
+        names = [step[0] for step in Header.get_plan().steps]
+        self.assertEqual(names, ["a, b, c, d, size", "data"])
+
+        names = [step[0] for step in Description.get_plan().steps]
+        self.assertEqual(len(names), 2)
+
+    def test_round_trip(self):
+        raw = b'\x01\x00\x00\x00\x02\x00' + b'\x03\x00\x00\x00' * 3 + b'\x04\x05' + b'\x02\x00\x00\x00\x06\x07'
+        h = Header().from_buffer(Buffer(raw))
+        self.assertEqual((h.a, h.b, h.c, h.d, h.size, h.data), (1, 2, [3, 3, 3], bytearray(b'\x04\x05'), 2, bytearray(b'\x06\x07')))
+
+        buf = Buffer()
+        h.serialize_to_buffer(buf)
+        self.assertEqual(buf.getvalue(), raw)
+
+    def test_error_names_field_of_merged_run(self):
+        level = logging.root.level
+        logging.root.setLevel(logging.WARNING)
+        out = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(out):
+                self.assertRaises(Exception, Header().from_buffer, Buffer(b'\x00' * 8))
+        finally:
+            logging.root.setLevel(level)
+        self.assertEqual(out.getvalue().strip(), "An error occurred while loading Header, at property c")
+
+    def test_read_depth_is_per_thread(self):
+        # A read in progress on another thread must not keep this one from reporting the field that failed
+        errors = []
+
+        def read():
+            try:
+                Header().from_buffer(Buffer(b'\x00' * 8))
+            except Exception as e:
+                errors.append(e)
+
+        level = logging.root.level
+        logging.root.setLevel(logging.WARNING)
+        out = io.StringIO()
+        FieldPlan._state.depth += 1
+        try:
+            with contextlib.redirect_stdout(out):
+                thread = threading.Thread(target=read)
+                thread.start()
+                thread.join()
+        finally:
+            FieldPlan._state.depth -= 1
+            logging.root.setLevel(level)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(out.getvalue().strip(), "An error occurred while loading Header, at property c")
+
+    def test_changed_array_length_falls_back(self):
+        h = Header().from_buffer(Buffer(b'\x00' * 24))
+        h.c = [1, 2]
+        buf = Buffer()
+        h.serialize_to_buffer(buf)
+        self.assertEqual(len(buf.getvalue()), 24 - 4)
+
+    def test_map_round_trip(self):
+        raw = pathlib.Path("resources/map/crusader/MxM_unseen_1.map").read_bytes()
+        m = Map().from_buffer(Buffer(raw))
+        buf = Buffer()
+        m.serialize_to_buffer(buf)
+        self.assertEqual(buf.getvalue(), raw)
+
+
+class Prefixed(Structure):
+    count = Field("count", "<H")
+    values = Field("values", "<I", count)
+
+
+class TestBulkArrays(unittest.TestCase):
+
+    def test_prefixed_format_array(self):
+        raw = b'\x02\x00' + b'\x01\x00\x00\x00\x02\x00\x00\x00'
+        p = Prefixed().from_buffer(Buffer(raw))
+        self.assertEqual(p.values, [1, 2])
+
+        p.values = [1, 2, 3]
+        buf = Buffer()
+        p.serialize_to_buffer(buf)
+        self.assertEqual(len(buf.getvalue()), 2 + 3 * 4)
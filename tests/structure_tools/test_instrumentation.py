@@ -0,0 +1,46 @@
+import pathlib
+import unittest
+from unittest import mock
+
+from sourcehold import load_map
+from sourcehold.structure_tools import instrumentation
+from sourcehold.structure_tools.Buffer import Buffer
+from sourcehold.structure_tools.instrumentation import instrument
+
+SAV_PATH = "resources/sav/crusader/example.sav"
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_report(self):
+        with instrument() as report:
+            m = load_map(SAV_PATH)
+            buf = Buffer()
+            m.serialize_to_buffer(buf)
+        self.assertFalse(instrumentation.active())
+
+        self.assertEqual(buf.getvalue(), pathlib.Path(SAV_PATH).read_bytes())
+
+        calls, nbytes, seconds = report.sections[(1045, "read")]
+        self.assertEqual(calls, 1)
+        self.assertEqual(nbytes, m.directory[1045].size_of())
+        self.assertIn((1045, "write"), report.sections)
+
+        calls, nbytes, seconds = report.fields[("Map", "directory", "read")]
+        self.assertEqual(nbytes, m.directory.directory_size + m.directory.size)
+        self.assertIn("Map.directory", report.summary())
+
+    def test_no_events_without_hooks(self):
+        self.assertFalse(instrumentation.active())
+        with mock.patch("sourcehold.structure_tools.FieldPlan.field_event") as field_event, \
+                mock.patch.object(instrumentation, "section_event") as section_event:
+            m = load_map(SAV_PATH)
+            m.serialize_to_buffer(Buffer())
+        field_event.assert_not_called()
+        section_event.assert_not_called()
+
+        with mock.patch("sourcehold.structure_tools.FieldPlan.field_event") as field_event, \
+                mock.patch.object(instrumentation, "section_event") as section_event, instrument():
+            load_map(SAV_PATH)
+        field_event.assert_called()
+        section_event.assert_called()
@@ -0,0 +1,76 @@
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from sourcehold import load_map, save_map
+from sourcehold.structure_tools.Buffer import Buffer
+from sourcehold.structure_tools.MemoryBuffer import MemoryBuffer
+from sourcehold.structure_tools.UnderflowException import UnderflowException
+
+MAP_PATH = "resources/map/crusader/MxM_unseen_1.map"
+
+
+class TestMemoryBuffer(unittest.TestCase):
+
+    def test_reads_are_views(self):
+        data = b'\x01\x02\x03\x04'
+        buf = MemoryBuffer(data)
+        self.assertEqual(buf.peek(2), b'\x01\x02')
+        self.assertEqual(buf.tell(), 0)
+        d = buf.read(3)
+        self.assertIsInstance(d, memoryview)
+        self.assertEqual(d, b'\x01\x02\x03')
+        self.assertEqual(buf.remaining(), 1)
+        self.assertRaises(UnderflowException, buf.read, 2)
+        self.assertTrue(buf.eof())
+
+    def test_zero_copy_load_map(self):
+        raw = pathlib.Path(MAP_PATH).read_bytes()
+        m = load_map(MAP_PATH, zero_copy=True)
+
+        self.assertIsInstance(m.directory.sections[0].data, memoryview)
+
+        buf = Buffer()
+        m.serialize_to_buffer(buf)
+        self.assertEqual(buf.getvalue(), raw)
+
+    def test_write_to_zero_copy_section(self):
+        m = load_map(MAP_PATH, zero_copy=True)
+        locked = m.u3.map_locked
+        m.u3.map_locked = 1 - locked
+        self.assertEqual(m.u3.map_locked, 1 - locked)
+
+    def test_close(self):
+        buf = MemoryBuffer.from_file(MAP_PATH)
+        d = buf.read(4)
+        self.assertRaises(Exception, buf.close)
+        self.assertFalse(buf._mmap.closed)
+        d.release()
+        buf.close()
+        self.assertTrue(buf._mmap.closed)
+
+        raw = pathlib.Path(MAP_PATH).read_bytes()
+        for kwargs in ({"zero_copy": True}, {"lazy": True, "unpack": False}, {"sections": [1045]}):
+            with load_map(MAP_PATH, **kwargs) as m:
+                mapped = m._buf
+            self.assertTrue(mapped._mmap.closed)
+            buf = Buffer()
+            m.serialize_to_buffer(buf)
+            self.assertEqual(buf.getvalue(), raw)
+
+    def test_save_over_mapped_file(self):
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, "example.map")
+            shutil.copyfile(MAP_PATH, path)
+            m = load_map(path, zero_copy=True)
+            mapped = m._buf
+            m.u3.map_locked = 1 - m.u3.map_locked
+            save_map(m, path)
+
+            self.assertTrue(mapped._mmap.closed)
+            self.assertEqual(load_map(path).u3.map_locked, m.u3.map_locked)
+        finally:
+            shutil.rmtree(folder)